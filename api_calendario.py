@@ -0,0 +1,343 @@
+"""
+Acesso à Google Calendar API sem dependência de interface: autenticação, build
+do service, busca paginada e em batch, sincronização incremental com o
+armazenamento local e conversão dos eventos para o registro `Evento`.
+Usado pelo widget (calendar_widget.py) e pela exportação headless (exportar.py).
+"""
+from datetime import datetime, timedelta, date
+import json
+import os.path
+
+# As bibliotecas do Google são importadas só quando usadas, para não atrasar a
+# primeira pintura do widget nem exigir a importação em quem só lê o armazenamento.
+
+import instrumentacao
+import transporte
+from armazenamento import diretorio_config, gravar_atomico
+from credenciais import GerenciadorCredenciais
+from modelo import Evento
+
+# Escopo da API
+SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
+
+# Projeção de campos (partial response): apenas o que o widget usa
+CAMPOS_EVENTOS = 'etag,nextPageToken,nextSyncToken,items(id,status,updated,start,end,summary,location,colorId,reminders)'
+
+# Máximo de requisições por chamada batch aceito pela API
+TAMANHO_LOTE = 50
+
+# Cor de fundo e lembretes padrão (antecedências em min) de cada calendário,
+# preenchidos por listar_calendarios
+cores_calendarios = {}
+lembretes_calendarios = {}
+
+# Credenciais OAuth (token no diretório de configuração, renovado em segundo plano)
+credenciais = GerenciadorCredenciais(SCOPES)
+
+def autenticar_google_calendar():
+    with instrumentacao.span('autenticacao'):
+        creds = obter_credenciais()
+    # A partir daqui o token é renovado em segundo plano antes de expirar
+    credenciais.iniciar()
+    with instrumentacao.span('build'):
+        return construir_servico(creds)
+
+def obter_credenciais():
+    """Credenciais válidas do token compartilhado (login no navegador na primeira vez)."""
+    return credenciais.obter()
+
+def construir_servico(creds, http=None):
+    """
+    Cria o service da Calendar API a partir de um documento de discovery local,
+    sem consultar a rede: primeiro a cópia no diretório de configuração, depois
+    o documento estático empacotado com a biblioteca. Só se nenhum existir o
+    build() normal é usado, e o documento obtido é salvo para as próximas vezes.
+    Por padrão, as requisições passam pelo transporte compartilhado (transporte.py).
+    """
+    from googleapiclient.discovery import build, build_from_document
+    
+    if http is None:
+        http = transporte.http_autorizado(creds)
+    documento = carregar_discovery()
+    if documento is not None:
+        return build_from_document(documento, http=http)
+    
+    service = build('calendar', 'v3', http=http, static_discovery=False)
+    gravar_atomico(_caminho_discovery(), json.dumps(service._rootDesc))
+    return service
+
+def carregar_discovery():
+    """Retorna o documento de discovery da Calendar v3 disponível localmente, ou None."""
+    try:
+        with open(_caminho_discovery(), encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        pass
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc('calendar', 'v3')
+
+def _caminho_discovery():
+    return os.path.join(diretorio_config(), 'calendar.v3.json')
+
+def get_inicio_fim_mes():
+    """Retorna o início e fim do mês atual em formato ISO."""
+    hoje = date.today()
+    primeiro_dia = date(hoje.year, hoje.month, 1)
+    
+    # Último dia do mês atual
+    if hoje.month == 12:
+        ultimo_dia = date(hoje.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        ultimo_dia = date(hoje.year, hoje.month + 1, 1) - timedelta(days=1)
+    
+    # Formatando para ISO
+    inicio = datetime.combine(primeiro_dia, datetime.min.time()).isoformat() + 'Z'
+    fim = datetime.combine(ultimo_dia, datetime.max.time()).isoformat() + 'Z'
+    
+    return inicio, fim
+
+def paginas_eventos(service, calendar_id='primary', tamanho_pagina=250, campos=CAMPOS_EVENTOS, **params):
+    """
+    Gerador sobre as páginas de events().list, seguindo nextPageToken.
+    Cada página é o dicionário da resposta, já limitado pela projeção `fields=`.
+    """
+    page_token = None
+    numero = 0
+    while True:
+        with instrumentacao.span('busca', calendario=calendar_id, pagina=numero) as dados:
+            pagina = service.events().list(
+                calendarId=calendar_id,
+                maxResults=tamanho_pagina,
+                pageToken=page_token,
+                fields=campos,
+                **params).execute(num_retries=transporte.TENTATIVAS)
+            dados['itens'] = len(pagina.get('items', []))
+        yield pagina
+        numero += 1
+        page_token = pagina.get('nextPageToken')
+        if not page_token:
+            return
+
+def buscar_eventos(service, calendar_id='primary', tamanho_pagina=250, inicio=None, fim=None):
+    """
+    Gerador com os eventos de um calendário em ordem de início, página por página
+    (só uma página em memória). Por padrão, o mês atual inteiro.
+    """
+    if inicio is None or fim is None:
+        inicio, fim = get_inicio_fim_mes()
+    
+    for pagina in paginas_eventos(service, calendar_id, tamanho_pagina,
+                                  timeMin=inicio, timeMax=fim,
+                                  singleEvents=True, orderBy='startTime'):
+        for evento in pagina.get('items', []):
+            evento['calendarId'] = calendar_id
+            yield evento
+
+def listar_calendarios(service):
+    """
+    Descobre os calendários do usuário via calendarList().list e retorna os IDs
+    dos que estão marcados como visíveis. Também registra a cor e os lembretes
+    padrão de cada um.
+    """
+    calendar_ids = []
+    page_token = None
+    while True:
+        resultado = service.calendarList().list(
+            pageToken=page_token,
+            fields='nextPageToken,items(id,backgroundColor,selected,primary,defaultReminders)'
+        ).execute(num_retries=transporte.TENTATIVAS)
+        for calendario in resultado.get('items', []):
+            if calendario.get('selected') or calendario.get('primary'):
+                calendar_ids.append(calendario['id'])
+                cores_calendarios[calendario['id']] = calendario.get('backgroundColor')
+                lembretes_calendarios[calendario['id']] = _antecedencias(calendario.get('defaultReminders'))
+        page_token = resultado.get('nextPageToken')
+        if not page_token:
+            return calendar_ids or ['primary']
+
+def sincronizar_eventos(service, armazenamento, calendar_ids=('primary',), janela=None, tamanho_pagina=250):
+    """
+    Sincroniza o armazenamento local com a API e retorna os eventos do mês atual
+    (ou de uma `janela` contida nele) de todos os calendários, mesclados em ordem de início.
+    """
+    sincronizar_armazenamento(service, armazenamento, calendar_ids, tamanho_pagina)
+    inicio, fim = janela.intervalo() if janela is not None else get_inicio_fim_mes()
+    return armazenamento.eventos_no_intervalo(list(calendar_ids), inicio, fim)
+
+def sincronizar_armazenamento(service, armazenamento, calendar_ids=('primary',), tamanho_pagina=250):
+    """
+    Sincroniza o armazenamento local com a API, sem ler os eventos de volta, e
+    retorna True se algo mudou (armazenamento.versao avançou).
+    Usa o syncToken salvo para baixar apenas o que mudou; faz sincronização
+    completa na primeira vez, quando o mês muda ou quando a API responde 410 Gone.
+    As requisições incrementais são condicionais (If-None-Match com o ETag da
+    última resposta); um 304 significa que o calendário não mudou.
+    Os calendários são consultados juntos em requisições batch, uma rodada por página.
+    """
+    inicio, fim = get_inicio_fim_mes()
+    versao = armazenamento.versao
+    
+    # Estado de cada calendário pendente: token de sync, página atual e itens acumulados
+    pendentes = {}
+    for calendar_id in calendar_ids:
+        estado = armazenamento.estado_sync(calendar_id)
+        incremental = estado and estado[0] and estado[1:3] == (inicio, fim)
+        pendentes[calendar_id] = {
+            'sync_token': estado[0] if incremental else None,
+            'etag': estado[3] if incremental else None,
+            'page_token': None,
+            'itens': [],
+        }
+    
+    from googleapiclient.errors import HttpError
+    
+    erros = {}
+    rodada = 0
+    while pendentes:
+        # Uma medição por rodada batch (uma página de cada calendário pendente)
+        with instrumentacao.span('busca', pagina=rodada, calendarios=len(pendentes),
+                                 incremental=sum(bool(p['sync_token']) for p in pendentes.values())):
+            respostas = _executar_em_lote(service, {
+                calendar_id: _requisicao_sync(service, calendar_id, pendente, inicio, fim, tamanho_pagina)
+                for calendar_id, pendente in pendentes.items()})
+        rodada += 1
+        
+        for calendar_id, (resposta, erro) in respostas.items():
+            pendente = pendentes[calendar_id]
+            if erro is not None:
+                status = erro.resp.status if isinstance(erro, HttpError) else None
+                if status == 304:
+                    # Nada mudou desde a última sincronização
+                    del pendentes[calendar_id]
+                elif status == 410 and pendente['sync_token']:
+                    # Token expirado: descartar o estado local e refazer a sincronização completa
+                    instrumentacao.aviso(
+                        f"syncToken expirado (410) em {calendar_id}, refazendo sincronização completa",
+                        calendario=calendar_id)
+                    armazenamento.invalidar(calendar_id)
+                    pendente.update(sync_token=None, etag=None, page_token=None, itens=[])
+                else:
+                    instrumentacao.aviso(f"Erro ao sincronizar {calendar_id}: {erro}",
+                                         calendario=calendar_id)
+                    erros[calendar_id] = erro
+                    del pendentes[calendar_id]
+                continue
+            
+            if pendente['page_token'] is None:
+                # ETag da primeira página, usado na próxima requisição condicional
+                pendente['etag_novo'] = resposta.get('etag')
+            pendente['itens'].extend(resposta.get('items', []))
+            pendente['page_token'] = resposta.get('nextPageToken')
+            if pendente['page_token']:
+                continue
+            
+            # Última página: o nextSyncToken só vem aqui
+            sync_token = resposta.get('nextSyncToken')
+            if pendente['sync_token']:
+                armazenamento.aplicar_mudancas(calendar_id, pendente['itens'], sync_token,
+                                               pendente['etag_novo'])
+            else:
+                armazenamento.substituir_calendario(calendar_id, pendente['itens'], sync_token,
+                                                    inicio, fim, pendente['etag_novo'])
+            del pendentes[calendar_id]
+    
+    # Só falha se nenhum calendário pôde ser sincronizado
+    if erros and len(erros) == len(calendar_ids):
+        raise next(iter(erros.values()))
+    return armazenamento.versao != versao
+
+def buscar_janela(service, calendar_ids, inicio, fim, tamanho_pagina=250):
+    """
+    Busca os eventos do intervalo (timeMin, timeMax) de uma janela fora do mês
+    sincronizado (sem syncToken), com todos os calendários juntos em requisições
+    batch. Retorna {calendar_id: [eventos da API em ordem de início]}.
+    """
+    resultado = {calendar_id: [] for calendar_id in calendar_ids}
+    page_tokens = dict.fromkeys(calendar_ids)
+    rodada = 0
+    while page_tokens:
+        with instrumentacao.span('busca', pagina=rodada, calendarios=len(page_tokens), janela=inicio):
+            respostas = _executar_em_lote(service, {
+                calendar_id: service.events().list(
+                    calendarId=calendar_id, timeMin=inicio, timeMax=fim, singleEvents=True,
+                    orderBy='startTime', maxResults=tamanho_pagina, pageToken=page_token,
+                    fields=CAMPOS_EVENTOS)
+                for calendar_id, page_token in page_tokens.items()})
+        rodada += 1
+        for calendar_id, (resposta, erro) in respostas.items():
+            if erro is not None:
+                raise erro
+            for evento in resposta.get('items', []):
+                evento['calendarId'] = calendar_id
+            resultado[calendar_id].extend(resposta.get('items', []))
+            page_tokens[calendar_id] = resposta.get('nextPageToken')
+            if not page_tokens[calendar_id]:
+                del page_tokens[calendar_id]
+    return resultado
+
+def _executar_em_lote(service, requisicoes):
+    """
+    Executa {request_id: requisição} em chamadas batch (até TAMANHO_LOTE por chamada)
+    e retorna {request_id: (resposta, erro)}.
+    """
+    respostas = {}
+    
+    def callback(request_id, response, exception):
+        respostas[request_id] = (response, exception)
+    
+    ids = list(requisicoes)
+    for i in range(0, len(ids), TAMANHO_LOTE):
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id in ids[i:i + TAMANHO_LOTE]:
+            batch.add(requisicoes[request_id], request_id=request_id)
+        batch.execute()
+    return respostas
+
+def _requisicao_sync(service, calendar_id, pendente, inicio, fim, tamanho_pagina):
+    """Monta a requisição events().list da próxima página de um calendário."""
+    params = {}
+    if pendente['sync_token']:
+        params['syncToken'] = pendente['sync_token']
+    else:
+        params['timeMin'] = inicio
+        params['timeMax'] = fim
+    requisicao = service.events().list(
+        calendarId=calendar_id,
+        maxResults=tamanho_pagina,
+        pageToken=pendente['page_token'],
+        fields=CAMPOS_EVENTOS,
+        singleEvents=True,
+        **params)
+    if pendente['sync_token'] and pendente['etag'] and pendente['page_token'] is None:
+        # Requisição condicional: a API responde 304 se nada mudou
+        requisicao.headers['If-None-Match'] = pendente['etag']
+    return requisicao
+
+def formatar_evento(event):
+    """Converte um evento da API no registro compacto usado pela interface."""
+    try:
+        return Evento.da_api(event, _cor_do_evento(event), _lembretes_do_evento(event))
+    except Exception as e:
+        instrumentacao.aviso(f"Erro ao formatar evento: {str(e)}", evento=event)
+        # Retorna um evento genérico para não quebrar a aplicação
+        return Evento(event.get('id'), event.get('calendarId'), event.get('updated'),
+                      f"Erro no evento: {e}", '1', False, date.today().toordinal(), None)
+
+def _cor_do_evento(event):
+    """colorId do evento ou, se não especificado, a cor do calendário de origem."""
+    if 'colorId' in event:
+        return event['colorId']
+    return cores_calendarios.get(event.get('calendarId')) or '1'  # Cor padrão
+
+def _lembretes_do_evento(event):
+    """Antecedências (min) dos lembretes popup do evento: os próprios ou os padrão do calendário."""
+    lembretes = event.get('reminders') or {'useDefault': True}
+    if lembretes.get('useDefault'):
+        return lembretes_calendarios.get(event.get('calendarId'), ())
+    return _antecedencias(lembretes.get('overrides'))
+
+def _antecedencias(lembretes):
+    return tuple(sorted({l['minutes'] for l in lembretes or () if l.get('method') == 'popup'}))
@@ -0,0 +1,213 @@
+"""
+Armazenamento local de eventos (SQLite) usado pela sincronização incremental.
+Guarda a última sincronização completa de cada calendário e o syncToken
+devolvido pela API para que as próximas atualizações baixem apenas as mudanças.
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+from modelo import Evento
+
+
+def diretorio_config():
+    """Retorna (e cria, se necessário) o diretório de configuração do usuário."""
+    if sys.platform.startswith('win'):
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+        caminho = os.path.join(base, 'PyGoogleCal')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+        caminho = os.path.join(base, 'pygooglecal')
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+
+def gravar_atomico(caminho, conteudo):
+    """
+    Grava o conteúdo (texto ou bytes) num temporário do mesmo diretório e o
+    troca de lugar com o destino: quem lê nunca vê um arquivo pela metade. O
+    temporário do mkstemp já nasce legível só pelo usuário (0600).
+    """
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def instante(valor):
+    """Converte um campo start/end da API (ou string ISO) em timestamp POSIX."""
+    if isinstance(valor, dict):
+        valor = valor.get('dateTime', valor.get('date'))
+    if not valor:
+        return None
+    if 'T' in valor:
+        return datetime.fromisoformat(valor.replace('Z', '+00:00')).timestamp()
+    # Data simples (AAAA-MM-DD): meia-noite no horário local
+    return datetime.strptime(valor, '%Y-%m-%d').timestamp()
+
+
+def _caminho_snapshot():
+    return os.path.join(diretorio_config(), 'snapshot.json')
+
+
+def salvar_snapshot(eventos, intervalo):
+    """
+    Grava (de forma atômica) os eventos já formatados da última atualização e o
+    intervalo (timeMin, timeMax) que eles cobrem, para que a próxima abertura do
+    widget possa pintá-los imediatamente.
+    """
+    conteudo = {
+        'salvo_em': datetime.now().isoformat(),
+        'intervalo': list(intervalo),
+        'eventos': [e.para_dict() for e in eventos],
+    }
+    gravar_atomico(_caminho_snapshot(), json.dumps(conteudo, ensure_ascii=False, separators=(',', ':')))
+
+
+def carregar_snapshot(intervalo):
+    """
+    Retorna (salvo_em, eventos) do último snapshot, ou None se não houver um
+    válido para o `intervalo` pedido (ex.: o snapshot é do mês passado).
+    """
+    try:
+        with open(_caminho_snapshot(), encoding='utf-8') as f:
+            conteudo = json.load(f)
+        if conteudo.get('intervalo') != list(intervalo):
+            return None
+        eventos = [Evento.de_dict(e) for e in conteudo['eventos']]
+        return datetime.fromisoformat(conteudo['salvo_em']), eventos
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class ArmazenamentoEventos:
+    """Banco SQLite com os eventos sincronizados e o estado de sync por calendário."""
+
+    def __init__(self, caminho=None):
+        if caminho is None:
+            caminho = os.path.join(diretorio_config(), 'eventos.sqlite3')
+        self.caminho = caminho
+        # A conexão é compartilhada entre threads, protegida por um lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS eventos (
+                calendar_id TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                inicio REAL,
+                fim REAL,
+                dados TEXT NOT NULL,
+                PRIMARY KEY (calendar_id, event_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_eventos_periodo
+                ON eventos (calendar_id, inicio, fim);
+            CREATE TABLE IF NOT EXISTS estado_sync (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT,
+                time_min TEXT,
+                time_max TEXT,
+                atualizado_em TEXT,
+                etag TEXT
+            );
+        """)
+        # Bancos criados antes da coluna etag
+        colunas = [linha[1] for linha in self._conn.execute('PRAGMA table_info(estado_sync)')]
+        if 'etag' not in colunas:
+            self._conn.execute('ALTER TABLE estado_sync ADD COLUMN etag TEXT')
+        self._conn.commit()
+        # Incrementado a cada alteração no conteúdo (para saber se algo mudou)
+        self.versao = 0
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+    def estado_sync(self, calendar_id):
+        """Retorna (sync_token, time_min, time_max, etag) ou None se nunca sincronizado."""
+        with self._lock:
+            linha = self._conn.execute(
+                'SELECT sync_token, time_min, time_max, etag FROM estado_sync WHERE calendar_id = ?',
+                (calendar_id,)).fetchone()
+        return linha
+
+    def substituir_calendario(self, calendar_id, eventos, sync_token, time_min, time_max, etag=None):
+        """Grava o resultado de uma sincronização completa, descartando o conteúdo anterior."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM eventos WHERE calendar_id = ?', (calendar_id,))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO eventos (calendar_id, event_id, inicio, fim, dados) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [self._linha(calendar_id, e) for e in eventos if e.get('status') != 'cancelled'])
+            self._gravar_estado(calendar_id, sync_token, time_min, time_max, etag)
+            self.versao += 1
+
+    def aplicar_mudancas(self, calendar_id, mudancas, sync_token, etag=None):
+        """Aplica o resultado de uma sincronização incremental (inclusões, alterações e exclusões)."""
+        removidos = [(calendar_id, e['id']) for e in mudancas if e.get('status') == 'cancelled']
+        alterados = [self._linha(calendar_id, e) for e in mudancas if e.get('status') != 'cancelled']
+        with self._lock, self._conn:
+            if removidos:
+                self._conn.executemany(
+                    'DELETE FROM eventos WHERE calendar_id = ? AND event_id = ?', removidos)
+            if alterados:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO eventos (calendar_id, event_id, inicio, fim, dados) '
+                    'VALUES (?, ?, ?, ?, ?)', alterados)
+            self._conn.execute(
+                'UPDATE estado_sync SET sync_token = ?, etag = ?, atualizado_em = ? WHERE calendar_id = ?',
+                (sync_token, etag, datetime.now().isoformat(), calendar_id))
+            if mudancas:
+                self.versao += 1
+
+    def invalidar(self, calendar_id):
+        """Descarta eventos e token de um calendário (ex.: após 410 Gone)."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM eventos WHERE calendar_id = ?', (calendar_id,))
+            self._conn.execute('DELETE FROM estado_sync WHERE calendar_id = ?', (calendar_id,))
+            self.versao += 1
+
+    def eventos_no_intervalo(self, calendar_ids, time_min, time_max):
+        """
+        Retorna os eventos armazenados que se sobrepõem ao intervalo, já mesclados
+        em ordem de início. Cada evento recebe a chave 'calendarId' de origem.
+        """
+        if isinstance(calendar_ids, str):
+            calendar_ids = [calendar_ids]
+        marcadores = ','.join('?' * len(calendar_ids))
+        with self._lock:
+            linhas = self._conn.execute(
+                f'SELECT calendar_id, dados FROM eventos WHERE calendar_id IN ({marcadores}) '
+                'AND inicio < ? AND fim > ? ORDER BY inicio',
+                (*calendar_ids, instante(time_max), instante(time_min))).fetchall()
+        eventos = []
+        for calendar_id, dados in linhas:
+            evento = json.loads(dados)
+            evento['calendarId'] = calendar_id
+            eventos.append(evento)
+        return eventos
+
+    def _gravar_estado(self, calendar_id, sync_token, time_min, time_max, etag):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO estado_sync '
+            '(calendar_id, sync_token, time_min, time_max, atualizado_em, etag) VALUES (?, ?, ?, ?, ?, ?)',
+            (calendar_id, sync_token, time_min, time_max, datetime.now().isoformat(), etag))
+
+    @staticmethod
+    def _linha(calendar_id, evento):
+        inicio = instante(evento.get('start'))
+        fim = instante(evento.get('end')) or inicio
+        return (calendar_id, evento['id'], inicio, fim,
+                json.dumps(evento, ensure_ascii=False, separators=(',', ':')))
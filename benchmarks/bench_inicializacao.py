@@ -0,0 +1,108 @@
+"""
+Benchmark de inicialização do widget.
+Mede separadamente: importação dos módulos, autenticação, build do service e
+primeira pintura da janela. Cada importação roda em um processo novo para
+medir o custo real de cold start.
+
+Uso:
+    python benchmarks/bench_inicializacao.py [--repeticoes N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Módulos medidos isoladamente (o primeiro é o que o widget paga ao iniciar)
+MODULOS = [
+    'calendar_widget',
+    'googleapiclient.discovery',
+    'google_auth_oauthlib.flow',
+    'google.oauth2.credentials',
+    'PIL.Image',
+    'requests',
+]
+
+
+def tempo_importacao(modulo):
+    """Tempo (ms) de `import modulo` em um interpretador novo, ou None se falhar."""
+    codigo = (
+        "import time; t = time.perf_counter(); "
+        f"import {modulo}; "
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ,
+                               capture_output=True, text=True)
+    if resultado.returncode != 0:
+        return None
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def medir_autenticacao():
+    import api_calendario
+    from credenciais import TOKEN_LEGADO, caminho_token
+    if not any(os.path.exists(c) for c in (caminho_token(), TOKEN_LEGADO)):
+        return None, None
+    return cronometrar(api_calendario.obter_credenciais)
+
+
+def medir_build(creds):
+    import api_calendario
+    if creds is None:
+        # Sem token salvo: mede o build com um transporte sem credenciais
+        import httplib2
+        return cronometrar(api_calendario.construir_servico, None, httplib2.Http())[0]
+    return cronometrar(api_calendario.construir_servico, creds)[0]
+
+
+def medir_primeira_pintura():
+    import tkinter as tk
+    import calendar_widget
+    try:
+        inicio = time.perf_counter()
+        root = calendar_widget.criar_interface()[0]
+        root.update()
+        decorrido = (time.perf_counter() - inicio) * 1000
+    except tk.TclError:
+        # Sem display disponível (use xvfb-run para medir em servidores)
+        return None
+    root.destroy()
+    return decorrido
+
+
+def formatar(ms):
+    return "   n/d" if ms is None else f"{ms:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    print("Importação (processo novo, mediana):")
+    for modulo in MODULOS:
+        amostras = [tempo_importacao(modulo) for _ in range(args.repeticoes)]
+        amostras = [a for a in amostras if a is not None]
+        print(f"  {modulo:28s} {formatar(statistics.median(amostras) if amostras else None)}")
+
+    ms_auth, creds = medir_autenticacao()
+    print(f"Autenticação (token.json)     {formatar(ms_auth)}")
+    try:
+        print(f"Build do service              {formatar(medir_build(creds))}")
+    except ImportError:
+        print(f"Build do service              {formatar(None)}")
+    print(f"Primeira pintura              {formatar(medir_primeira_pintura())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark do caminho conversão -> ordenação -> índice de intervalos -> linhas.
+Gera eventos sintéticos no formato da API e mede cada fase separadamente.
+
+Uso:
+    python benchmarks/bench_modelo.py [--eventos N] [--repeticoes N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from operator import attrgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_calendario
+import calendar_widget
+
+
+def gerar_eventos(quantidade, semente=42):
+    """Eventos da API espalhados por um ano, com ~20% de dia inteiro (alguns de vários dias)."""
+    aleatorio = random.Random(semente)
+    inicio = date.today().replace(month=1, day=1)
+    eventos = []
+    for i in range(quantidade):
+        dia = inicio + timedelta(days=aleatorio.randrange(365))
+        if aleatorio.random() < 0.2:
+            start = {'date': dia.isoformat()}
+            end = {'date': (dia + timedelta(days=aleatorio.choice((1, 1, 1, 3, 7)))).isoformat()}
+        else:
+            hora = aleatorio.randrange(23)
+            start = {'dateTime': f"{dia.isoformat()}T{hora:02d}:{aleatorio.randrange(60):02d}:00-03:00"}
+            end = {'dateTime': f"{dia.isoformat()}T{hora + 1:02d}:{aleatorio.randrange(60):02d}:00-03:00"}
+        eventos.append({
+            'id': f"evt{i}",
+            'calendarId': 'primary',
+            'updated': '2025-01-01T00:00:00.000Z',
+            'summary': f"Evento {i}",
+            'colorId': str(aleatorio.randrange(1, 12)),
+            'start': start,
+            'end': end,
+        })
+    return eventos
+
+
+def medir(funcao, repeticoes):
+    """Menor tempo (ms) entre as repetições e o último resultado."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--eventos', type=int, default=10_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    brutos = gerar_eventos(args.eventos)
+    # O armazenamento devolve os eventos ordenados pelo início
+    brutos.sort(key=lambda e: e['start'].get('dateTime', e['start'].get('date')))
+
+    ms_conversao, eventos = medir(lambda: [api_calendario.formatar_evento(e) for e in brutos],
+                                  args.repeticoes)
+    ms_ordenacao, _ = medir(lambda: sorted(eventos, key=attrgetter('ordem')), args.repeticoes)
+    eventos.sort(key=attrgetter('ordem'))
+    ms_indice, indice = medir(lambda: calendar_widget.novo_indice(eventos), args.repeticoes)
+    # Atualização incremental: uma atualização que muda só alguns eventos
+    alterados = eventos[:10] + eventos[20:]
+    ms_incremental, _ = medir(lambda: (indice.sincronizar(alterados), indice.sincronizar(eventos)),
+                              args.repeticoes)
+    agora = eventos[len(eventos) // 2].inicio_min
+    ms_agora, _ = medir(lambda: indice.no_ponto(agora), args.repeticoes)
+    ms_linhas, linhas = medir(lambda: calendar_widget.montar_linhas(eventos, indice, agora=agora),
+                              args.repeticoes)
+    busca = calendar_widget.indice_busca
+    ms_busca_indice, _ = medir(lambda: (busca.sincronizar(()), busca.sincronizar(eventos)), 1)
+    ms_busca, encontrados = medir(lambda: busca.buscar('evento 12'), args.repeticoes)
+
+    print(f"{args.eventos} eventos, {len(linhas)} linhas")
+    print(f"  conversão (formatar_evento)  {ms_conversao:8.2f} ms")
+    print(f"  ordenação                    {ms_ordenacao:8.2f} ms")
+    print(f"  índice de intervalos         {ms_indice:8.2f} ms")
+    print(f"  índice: 10 alterações (x2)   {ms_incremental:8.2f} ms")
+    print(f"  consulta 'agora'             {ms_agora:8.3f} ms")
+    print(f"  montagem das linhas          {ms_linhas:8.2f} ms")
+    print(f"  busca: índice invertido      {ms_busca_indice:8.2f} ms")
+    print(f"  busca: consulta ({len(encontrados):4d})       {ms_busca:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
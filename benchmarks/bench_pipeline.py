@@ -0,0 +1,188 @@
+"""
+Benchmark do caminho completo busca -> conversão -> agrupamento -> renderização,
+contra um `service` falso da Calendar API (benchmarks/servico_falso.py).
+Para cada tamanho, gera calendários sintéticos no mês atual e mede o tempo
+(menor entre as repetições) e o pico de memória (tracemalloc) de cada fase:
+
+    busca        buscar_janela: batch + paginação + decodificação do JSON
+    sync         sincronizar_eventos completo, gravando no SQLite
+    sync 304     sincronização incremental sem mudanças (If-None-Match), sem reler o SQLite
+    conversão    formatar_evento + ordenação
+    agrupamento  índice de intervalos + montar_linhas
+    render       exibir_eventos em um Tk real (n/d sem display; use xvfb-run)
+
+Uso:
+    python benchmarks/bench_pipeline.py [--tamanhos 10,1000,10000,100000]
+        [--calendarios N] [--repeticoes N] [--salvar arquivo.json] [--comparar arquivo.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from operator import attrgetter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import api_calendario
+import calendar_widget
+from armazenamento import ArmazenamentoEventos
+from janelas import JanelaTempo
+from servico_falso import ServicoFalso, gerar_calendarios
+
+FASES = ('busca', 'sync', 'sync 304', 'conversão', 'agrupamento', 'render')
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """
+    (menor tempo em ms, pico de memória em KB, último resultado). O pico é medido
+    numa execução extra com tracemalloc, para não distorcer os tempos.
+    """
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return melhor * 1000, pico / 1024, resultado
+
+
+def criar_lista_tk():
+    """Lista de eventos em uma janela Tk real, ou None sem display disponível."""
+    import tkinter as tk
+    from lista_eventos import ListaEventosCanvas
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    canvas = tk.Canvas(root, width=320, height=400)
+    canvas.pack()
+    contador = tk.Label(root)
+    root.update()
+    return root, ListaEventosCanvas(canvas, calendar_widget.cores_atuais), contador
+
+
+def medir_tamanho(quantidade, calendarios, repeticoes, tk_lista):
+    janela = JanelaTempo.atual('mes')
+    dados = gerar_calendarios(quantidade, calendarios, inicio=janela.inicio,
+                              dias=(janela.fim - janela.inicio).days + 1)
+    ids = list(dados)
+    servico = ServicoFalso(dados)
+    resultados = {}
+
+    # Tráfego de uma busca completa da janela (páginas de todos os calendários)
+    api_calendario.buscar_janela(servico, ids, *janela.intervalo())
+    trafego = {'requisicoes': servico.requisicoes, 'bytes': servico.bytes_recebidos}
+
+    resultados['busca'] = medir(lambda: api_calendario.buscar_janela(servico, ids, *janela.intervalo()),
+                                repeticoes)
+    brutos = [e for lista in resultados['busca'][2].values() for e in lista]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = ArmazenamentoEventos(os.path.join(diretorio, 'eventos.db'))
+
+        def invalidar():
+            for calendar_id in ids:
+                armazenamento.invalidar(calendar_id)
+
+        resultados['sync'] = medir(
+            lambda: api_calendario.sincronizar_eventos(servico, armazenamento, ids),
+            repeticoes, preparar=invalidar)
+        resultados['sync 304'] = medir(
+            lambda: api_calendario.sincronizar_armazenamento(servico, armazenamento, ids), repeticoes)
+        armazenamento.fechar()
+
+    def converter():
+        eventos = [api_calendario.formatar_evento(e) for e in brutos]
+        eventos.sort(key=attrgetter('ordem'))
+        return eventos
+
+    resultados['conversão'] = medir(converter, repeticoes)
+    eventos = resultados['conversão'][2]
+
+    agora = eventos[len(eventos) // 2].inicio_min if eventos else 0
+    resultados['agrupamento'] = medir(
+        lambda: calendar_widget.montar_linhas(eventos, calendar_widget.novo_indice(eventos),
+                                             janela, agora),
+        repeticoes)
+
+    if tk_lista is not None:
+        root, lista, contador = tk_lista
+
+        def limpar():
+            # Primeira exibição: índices vazios e lista sem linhas
+            calendar_widget.indice_eventos = None
+            calendar_widget.indice_busca.sincronizar(())
+            lista.mensagem('', 'cinza_texto')
+            root.update()
+
+        def renderizar():
+            calendar_widget.exibir_eventos(lista, eventos, contador)
+            root.update()
+
+        resultados['render'] = medir(renderizar, repeticoes, preparar=limpar)
+
+    trafego['linhas'] = len(resultados['agrupamento'][2])
+    return {fase: {'ms': ms, 'pico_kb': pico} for fase, (ms, pico, _) in resultados.items()}, trafego
+
+
+def formatar_delta(atual, anterior):
+    if not anterior:
+        return ''
+    return f" ({(atual - anterior) / anterior * 100:+5.1f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', default='10,1000,10000,100000',
+                        help="quantidades de eventos, separadas por vírgula")
+    parser.add_argument('--calendarios', type=int, default=3)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--salvar', help="grava os resultados em JSON para comparar depois")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior (mostra a variação)")
+    args = parser.parse_args()
+
+    anterior = {}
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    tk_lista = criar_lista_tk()
+    if tk_lista is None:
+        print("Sem display: fase 'render' não medida (use xvfb-run)")
+
+    todos = {}
+    for quantidade in (int(t) for t in args.tamanhos.split(',')):
+        fases, info = medir_tamanho(quantidade, args.calendarios, args.repeticoes, tk_lista)
+        todos[str(quantidade)] = fases
+        print(f"\n{quantidade} eventos em {args.calendarios} calendários: "
+              f"{info['requisicoes']} páginas, {info['bytes'] / 1024:.0f} KB, {info['linhas']} linhas")
+        for fase in FASES:
+            if fase not in fases:
+                print(f"  {fase:12s}      n/d")
+                continue
+            ms, pico = fases[fase]['ms'], fases[fase]['pico_kb']
+            antes = anterior.get(str(quantidade), {}).get(fase, {})
+            print(f"  {fase:12s} {ms:9.2f} ms{formatar_delta(ms, antes.get('ms'))}"
+                  f"   pico {pico:9.0f} KB{formatar_delta(pico, antes.get('pico_kb'))}")
+
+    if tk_lista is not None:
+        tk_lista[0].destroy()
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as f:
+            json.dump(todos, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Substituto local do `service` da Calendar API v3 para os benchmarks.
+Implementa só o que o widget usa: events().list (com paginação, timeMin/timeMax,
+syncToken e If-None-Match) e requisições batch. Cada página é guardada como o
+JSON que viria da rede e decodificada a cada execução, como faz o cliente real.
+"""
+import json
+import random
+from datetime import date, timedelta
+
+TITULOS = ('Reunião de equipe', 'Almoço', 'Dentista', 'Aula de inglês', 'Revisão da sprint',
+           '1:1', 'Planejamento', 'Academia', 'Entrega do relatório', 'Aniversário')
+
+
+def gerar_calendarios(quantidade, calendarios=1, inicio=None, dias=30, semente=42):
+    """
+    {calendar_id: [eventos da API]} com `quantidade` eventos ao todo, espalhados
+    por `dias` a partir de `inicio`: ~20% de dia inteiro (alguns de vários dias)
+    e os demais com horário, de 30 min a 3 h.
+    """
+    aleatorio = random.Random(semente)
+    inicio = inicio or date.today().replace(day=1)
+    ids = ['primary'] + [f"calendario{i}@group.calendar.google.com" for i in range(1, calendarios)]
+    resultado = {calendar_id: [] for calendar_id in ids}
+    for i in range(quantidade):
+        dia = inicio + timedelta(days=aleatorio.randrange(dias))
+        if aleatorio.random() < 0.2:
+            duracao = aleatorio.choice((1, 1, 1, 2, 5))
+            start = {'date': dia.isoformat()}
+            end = {'date': (dia + timedelta(days=duracao)).isoformat()}
+        else:
+            minuto = aleatorio.randrange(6 * 60, 21 * 60)
+            fim = minuto + aleatorio.choice((30, 60, 60, 90, 180))
+            start = {'dateTime': f"{dia.isoformat()}T{minuto // 60:02d}:{minuto % 60:02d}:00-03:00"}
+            end = {'dateTime': f"{dia.isoformat()}T{fim // 60:02d}:{fim % 60:02d}:00-03:00"}
+        calendar_id = ids[i % len(ids)]
+        resultado[calendar_id].append({
+            'id': f"evt{i:06d}",
+            'status': 'confirmed',
+            'updated': '2025-01-01T00:00:00.000Z',
+            'summary': f"{aleatorio.choice(TITULOS)} {i}",
+            'colorId': str(aleatorio.randrange(1, 12)),
+            'start': start,
+            'end': end,
+        })
+    return resultado
+
+
+class ServicoFalso:
+    """Responde events().list a partir de `calendarios` ({calendar_id: [eventos]})."""
+
+    def __init__(self, calendarios):
+        self.calendarios = calendarios
+        self.requisicoes = 0
+        self.bytes_recebidos = 0
+        self._paginas = {}  # (calendar_id, timeMin, timeMax, sync, tamanho) -> (etag, [JSON das páginas])
+
+    def events(self):
+        return _Eventos(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Lote(callback)
+
+    def _paginas_de(self, calendar_id, time_min, time_max, sync, tamanho):
+        chave = (calendar_id, time_min, time_max, sync, tamanho)
+        if chave not in self._paginas:
+            eventos = self.calendarios.get(calendar_id)
+            if eventos is None:
+                raise _erro_http(404, b'notFound')
+            if sync:
+                # Incremental: nada mudou desde o último token
+                eventos = []
+            elif time_min or time_max:
+                eventos = [e for e in eventos if _sobrepoe(e, time_min, time_max)]
+            etag = f'"{calendar_id}-{len(self.calendarios[calendar_id])}"'
+            paginas = []
+            for i in range(0, max(len(eventos), 1), tamanho):
+                pagina = {'etag': etag, 'items': eventos[i:i + tamanho]}
+                if i + tamanho < len(eventos):
+                    pagina['nextPageToken'] = str(i + tamanho)
+                else:
+                    pagina['nextSyncToken'] = f"sync-{calendar_id}"
+                paginas.append(json.dumps(pagina).encode('utf-8'))
+            self._paginas[chave] = (etag, paginas)
+        return self._paginas[chave]
+
+
+class _Eventos:
+    def __init__(self, servico):
+        self._servico = servico
+
+    def list(self, calendarId='primary', maxResults=250, pageToken=None, syncToken=None,
+             timeMin=None, timeMax=None, **_):
+        return _Requisicao(self._servico, calendarId, maxResults, pageToken, syncToken,
+                           timeMin, timeMax)
+
+
+class _Requisicao:
+    def __init__(self, servico, calendar_id, tamanho, page_token, sync_token, time_min, time_max):
+        self._servico = servico
+        self._args = (calendar_id, time_min, time_max, bool(sync_token), tamanho)
+        self._pagina = int(page_token) // tamanho if page_token else 0
+        self.headers = {}
+
+    def execute(self, num_retries=0):
+        self._servico.requisicoes += 1
+        etag, paginas = self._servico._paginas_de(*self._args)
+        if self.headers.get('If-None-Match') == etag:
+            raise _erro_http(304, b'')
+        corpo = paginas[self._pagina]
+        self._servico.bytes_recebidos += len(corpo)
+        return json.loads(corpo)
+
+
+class _Lote:
+    def __init__(self, callback):
+        self._callback = callback
+        self._requisicoes = []
+
+    def add(self, requisicao, request_id=None):
+        self._requisicoes.append((request_id, requisicao))
+
+    def execute(self):
+        for request_id, requisicao in self._requisicoes:
+            try:
+                resposta, erro = requisicao.execute(), None
+            except Exception as e:
+                resposta, erro = None, e
+            self._callback(request_id, resposta, erro)
+
+
+def _sobrepoe(evento, time_min, time_max):
+    """Mesma regra da API: o evento termina depois de timeMin e começa antes de timeMax."""
+    inicio = evento['start'].get('dateTime') or evento['start']['date']
+    fim = evento['end'].get('dateTime') or evento['end']['date']
+    # Comparação pela data (suficiente para os dados sintéticos, alinhados a dias)
+    return (not time_min or fim[:10] >= time_min[:10]) and (not time_max or inicio[:10] <= time_max[:10])
+
+
+def _erro_http(status, conteudo):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    return HttpError(httplib2.Response({'status': status}), conteudo)
@@ -0,0 +1,91 @@
+"""
+Cache em disco para recursos remotos (como o ícone do cabeçalho).
+A imagem é guardada já decodificada e redimensionada em PNG, pronta para o
+tk.PhotoImage. A criação da janela só lê o disco; o download e a revalidação
+(ETag / Last-Modified) acontecem em uma thread separada, com timeout curto,
+pela sessão HTTP compartilhada (transporte.py).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from io import BytesIO
+
+import instrumentacao
+import transporte
+from armazenamento import diretorio_config, gravar_atomico
+
+# Timeout de (conexão, leitura) em segundos para downloads de assets
+TIMEOUT = (3, 5)
+
+# Intervalo mínimo entre revalidações do mesmo recurso
+REVALIDAR_A_CADA = 24 * 60 * 60
+
+
+def diretorio_assets():
+    caminho = os.path.join(diretorio_config(), 'assets')
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+
+def obter_imagem(url, tamanho):
+    """
+    Retorna o caminho do PNG em cache para `url` no `tamanho` pedido, ou None se
+    ainda não houver cópia local (o chamador usa seu fallback embutido).
+    Nunca acessa a rede: se necessário, agenda uma revalidação em segundo plano.
+    """
+    caminho, caminho_meta = _caminhos(url, tamanho)
+    meta = _ler_meta(caminho_meta)
+    existe = os.path.exists(caminho)
+    if not existe or time.time() - meta.get('verificado_em', 0) > REVALIDAR_A_CADA:
+        threading.Thread(target=_revalidar, args=(url, tamanho, meta),
+                         name='cache_assets', daemon=True).start()
+    return caminho if existe else None
+
+
+def _caminhos(url, tamanho):
+    nome = hashlib.sha1(f"{url}|{tamanho[0]}x{tamanho[1]}".encode()).hexdigest()
+    base = os.path.join(diretorio_assets(), nome)
+    return base + '.png', base + '.json'
+
+
+def _ler_meta(caminho_meta):
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _revalidar(url, tamanho, meta):
+    """Baixa o recurso (requisição condicional) e atualiza o cache em disco."""
+    from PIL import Image
+
+    caminho, caminho_meta = _caminhos(url, tamanho)
+    headers = {}
+    if os.path.exists(caminho):
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = transporte.sessao().get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code != 304:
+            response.raise_for_status()
+            # Decodificar e redimensionar uma única vez; o cache guarda o resultado
+            icon = Image.open(BytesIO(response.content)).resize(tamanho)
+            saida = BytesIO()
+            icon.save(saida, format='PNG')
+            gravar_atomico(caminho, saida.getvalue())
+            meta = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+    except Exception as e:
+        instrumentacao.aviso(f"Erro ao atualizar asset {url}: {e}", url=url)
+        return
+
+    meta['verificado_em'] = time.time()
+    gravar_atomico(caminho_meta, json.dumps(meta))
@@ -1,535 +1,759 @@
-import tkinter as tk
-from datetime import datetime, timedelta, date
-import calendar
-import os.path
-import threading
-from PIL import Image, ImageTk
-import requests
-from io import BytesIO
-
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
-
-# Escopo da API
-SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
-
-# Cores do Google Calendar
-CORES = {
-    'azul': '#4285F4',     # Azul principal do Google
-    'vermelho': '#EA4335', # Vermelho Google
-    'amarelo': '#FBBC05',  # Amarelo Google
-    'verde': '#34A853',    # Verde Google
-    'cinza_claro': '#F1F3F4', # Fundo claro do Google Calendar
-    'cinza_texto': '#3C4043',  # Cor padrão de texto
-    'cinza_data': '#5F6368',   # Cor secundária (data)
-    'branco': '#FFFFFF',
-}
-
-# Cores do modo escuro
-CORES_DARK = {
-    'azul': '#8AB4F8',     # Azul mais claro para modo escuro
-    'vermelho': '#F28B82', # Vermelho adaptado para modo escuro
-    'amarelo': '#FDD663',  # Amarelo adaptado para modo escuro
-    'verde': '#81C995',    # Verde adaptado para modo escuro
-    'cinza_claro': '#202124', # Fundo escuro do Google Calendar
-    'cinza_texto': '#E8EAED',  # Cor padrão de texto (claro)
-    'cinza_data': '#9AA0A6',   # Cor secundária (data) mais clara
-    'branco': '#2D2E30',     # Fundo dos cards
-}
-
-# Variável global para controlar o modo atual
-modo_dark = False
-cores_atuais = CORES
-
-def alternar_modo():
-    global modo_dark, cores_atuais
-    modo_dark = not modo_dark
-    cores_atuais = CORES_DARK if modo_dark else CORES
-    # A interface será recriada com as novas cores
-
-def autenticar_google_calendar():
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
-    
-    service = build('calendar', 'v3', credentials=creds)
-    return service
-
-def get_inicio_fim_mes():
-    """Retorna o início e fim do mês atual em formato ISO."""
-    hoje = date.today()
-    primeiro_dia = date(hoje.year, hoje.month, 1)
-    
-    # Último dia do mês atual
-    if hoje.month == 12:
-        ultimo_dia = date(hoje.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        ultimo_dia = date(hoje.year, hoje.month + 1, 1) - timedelta(days=1)
-    
-    # Formatando para ISO
-    inicio = datetime.combine(primeiro_dia, datetime.min.time()).isoformat() + 'Z'
-    fim = datetime.combine(ultimo_dia, datetime.max.time()).isoformat() + 'Z'
-    
-    return inicio, fim
-
-def buscar_eventos(service, max_results=50):
-    # Definir período para o mês atual inteiro
-    inicio, fim = get_inicio_fim_mes()
-    
-    print(f"Buscando eventos entre {inicio} e {fim}")
-    
-    events_result = service.events().list(
-        calendarId='primary', 
-        timeMin=inicio,
-        timeMax=fim,
-        maxResults=max_results, 
-        singleEvents=True,
-        orderBy='startTime').execute()
-    
-    return events_result.get('items', [])
-
-def formatar_evento(event):
-    try:
-        # Obter data e hora de início
-        inicio = event['start'].get('dateTime', event['start'].get('date'))
-        
-        # Tratando formato de data diferente
-        if 'Z' in inicio:
-            # Formato ISO com timezone
-            data_inicio = datetime.fromisoformat(inicio.replace('Z', '+00:00'))
-        elif 'T' in inicio:
-            # Formato ISO sem timezone
-            data_inicio = datetime.fromisoformat(inicio)
-        else:
-            # Formato simples de data (AAAA-MM-DD)
-            data_inicio = datetime.strptime(inicio, '%Y-%m-%d')
-        
-        # Verificar se é um evento de dia inteiro
-        if 'date' in event['start'] and 'dateTime' not in event['start']:
-            evento = {
-                'dia_inteiro': True,
-                'data': data_inicio.strftime('%d/%m/%Y'),
-                'data_curta': data_inicio.strftime('%d/%m'),
-                'titulo': event.get('summary', 'Evento sem título'),
-                'cor': event.get('colorId', '1'),  # Cor padrão se não especificada
-                'data_obj': data_inicio,  # Para ordenação
-            }
-        else:
-            # Evento com hora marcada
-            evento = {
-                'dia_inteiro': False,
-                'data': data_inicio.strftime('%d/%m/%Y'),
-                'data_curta': data_inicio.strftime('%d/%m'),
-                'hora': data_inicio.strftime('%H:%M'),
-                'titulo': event.get('summary', 'Evento sem título'),
-                'cor': event.get('colorId', '1'),  # Cor padrão se não especificada
-                'data_obj': data_inicio,  # Para ordenação
-            }
-            
-        return evento
-    except Exception as e:
-        print(f"Erro ao formatar evento: {str(e)}")
-        print(f"Evento problemático: {event}")
-        # Retorna um evento genérico para não quebrar a aplicação
-        return {
-            'dia_inteiro': False,
-            'data': datetime.now().strftime('%d/%m/%Y'),
-            'data_curta': datetime.now().strftime('%d/%m'),
-            'hora': '??:??',
-            'titulo': f"Erro no evento: {e}",
-            'cor': '1',
-            'data_obj': datetime.now(),
-        }
-
-def criar_botao_toggle(parent, is_on=False):
-    """Cria um botão de toggle estilo on/off"""
-    toggle_frame = tk.Frame(parent, height=22, width=44, bg=cores_atuais['branco'])
-    toggle_frame.pack_propagate(False)  # Manter o tamanho fixo
-    
-    # Cores do botão
-    bg_on = "#34A853"  # Verde Google
-    bg_off = "#9AA0A6"  # Cinza do Google
-    
-    # Criar o botão toggle
-    toggle_button = tk.Frame(toggle_frame, width=44, height=22, bg=bg_on if is_on else bg_off, cursor="hand2")
-    toggle_button.pack(fill="both", expand=True)
-    toggle_button.pack_propagate(False)
-    
-    # Botão deslizante
-    slider = tk.Frame(toggle_button, width=18, height=18, bg=cores_atuais['branco'], 
-                   highlightthickness=0, bd=0)
-    slider.place(x=22 if is_on else 4, y=2)
-    
-    # Texto de status
-    text_var = tk.StringVar(value="ON" if is_on else "OFF")
-    status_text = tk.Label(toggle_button, textvariable=text_var, fg=cores_atuais['branco'],
-                       bg=bg_on if is_on else bg_off, font=("Arial", 8, "bold"))
-    status_text.place(x=6 if is_on else 20, y=2)
-    
-    def toggle():
-        nonlocal is_on
-        is_on = not is_on
-        if is_on:
-            toggle_button.config(bg=bg_on)
-            status_text.config(bg=bg_on)
-            slider.place(x=22, y=2)
-            text_var.set("ON")
-            status_text.place(x=6, y=2)
-        else:
-            toggle_button.config(bg=bg_off)
-            status_text.config(bg=bg_off)
-            slider.place(x=4, y=2)
-            text_var.set("OFF")
-            status_text.place(x=20, y=2)
-        
-        # Chamar a função de alternar modo
-        reconstruir_interface(toggle_button.winfo_toplevel(), alternar_modo)
-    
-    # Vincular o evento de clique
-    toggle_button.bind("<Button-1>", lambda e: toggle())
-    slider.bind("<Button-1>", lambda e: toggle())
-    status_text.bind("<Button-1>", lambda e: toggle())
-    
-    return toggle_frame
-
-def criar_interface():
-    global cores_atuais
-    # Criar janela principal
-    root = tk.Tk()
-    root.overrideredirect(True)  # sem bordas
-    root.attributes('-topmost', False)
-    root.after(10, lambda: root.wm_attributes("-topmost", False))
-    root.geometry("+50+50")  # posição na tela
-    
-    # Configurar estilo
-    root.configure(bg=cores_atuais['cinza_claro'])
-    
-    # Frame principal com bordas arredondadas e sombra - TAMANHO REDUZIDO
-    main_frame = tk.Frame(root, bg=cores_atuais['branco'], padx=10, pady=10)
-    main_frame.pack(padx=6, pady=6)
-    
-    # Cabeçalho com ícone e título
-    header_frame = tk.Frame(main_frame, bg=cores_atuais['branco'])
-    header_frame.pack(fill='x', pady=(0, 8))
-    
-    # Tentativa de carregar o ícone do Google Calendar
-    try:
-        icon_url = "https://ssl.gstatic.com/calendar/images/dynamiclogo_2020q4/calendar_17_2x.png"
-        response = requests.get(icon_url)
-        img_data = response.content
-        icon = Image.open(BytesIO(img_data))
-        icon = icon.resize((20, 20))  # Tamanho reduzido
-        photo = ImageTk.PhotoImage(icon)
-        icon_label = tk.Label(header_frame, image=photo, bg=cores_atuais['branco'])
-        icon_label.image = photo
-        icon_label.pack(side='left', padx=(0, 6))  # Espaçamento reduzido
-    except:
-        # Se falhar ao carregar o ícone, usa um label de texto
-        icon_label = tk.Label(header_frame, text="📅", font=("Arial", 14), bg=cores_atuais['branco'], fg=cores_atuais['azul'])
-        icon_label.pack(side='left', padx=(0, 6))
-    
-    # Título com o mês atual
-    mes_atual = datetime.now().strftime('%B %Y')
-    mes_atual = mes_atual.replace('January', 'Janeiro').replace('February', 'Fevereiro')
-    mes_atual = mes_atual.replace('March', 'Março').replace('April', 'Abril')
-    mes_atual = mes_atual.replace('May', 'Maio').replace('June', 'Junho')
-    mes_atual = mes_atual.replace('July', 'Julho').replace('August', 'Agosto')
-    mes_atual = mes_atual.replace('September', 'Setembro').replace('October', 'Outubro')
-    mes_atual = mes_atual.replace('November', 'Novembro').replace('December', 'Dezembro')
-    
-    title_label = tk.Label(header_frame, text=f"Agenda - {mes_atual}", font=("Arial", 12, "bold"), 
-                        bg=cores_atuais['branco'], fg=cores_atuais['azul'])
-    title_label.pack(side='left')
-    
-    # Adicionar contador de eventos (inicialmente vazio)
-    eventos_count_label = tk.Label(header_frame, text="", font=("Arial", 10), 
-                               bg=cores_atuais['branco'], fg=cores_atuais['cinza_texto'])
-    eventos_count_label.pack(side='left', padx=(8, 0))
-    
-    # Frame para o modo dark
-    dark_mode_frame = tk.Frame(header_frame, bg=cores_atuais['branco'])
-    dark_mode_frame.pack(side='right', padx=(0, 6))
-    
-    # Label para o texto "Dark"
-    dark_label = tk.Label(dark_mode_frame, text="Dark", font=("Arial", 10), 
-                       bg=cores_atuais['branco'], fg=cores_atuais['cinza_texto'])
-    dark_label.pack(side='left', padx=(0, 4))
-    
-    # Botão toggle
-    toggle_button = criar_botao_toggle(dark_mode_frame, modo_dark)
-    toggle_button.pack(side='left')
-    
-    # Botão fechar (X)
-    close_button = tk.Label(header_frame, text="✕", font=("Arial", 12), 
-                        bg=cores_atuais['branco'], fg=cores_atuais['cinza_texto'])
-    close_button.pack(side='right', padx=(6, 0))
-    close_button.bind("<Button-1>", lambda e: root.destroy())
-    
-    # Separador
-    separator = tk.Frame(main_frame, height=1, bg=cores_atuais['cinza_claro'])
-    separator.pack(fill='x', pady=(0, 8))
-    
-    # Frame para conter os eventos com rolagem de mouse (sem scrollbar)
-    events_container_frame = tk.Frame(main_frame, bg=cores_atuais['branco'])
-    events_container_frame.pack(fill='both', expand=True)
-    
-    # Canvas para permitir rolagem com mouse
-    canvas = tk.Canvas(events_container_frame, bg=cores_atuais['branco'], highlightthickness=0, 
-                     width=320, height=400)
-    canvas.pack(fill='both', expand=True)
-    
-    # Frame dentro do canvas para conter os eventos
-    events_frame = tk.Frame(canvas, bg=cores_atuais['branco'])
-    events_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-    canvas.create_window((0, 0), window=events_frame, anchor='nw', width=320)
-    
-    # Configurar rolagem com mouse
-    def _on_mousewheel(event):
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-    
-    canvas.bind_all("<MouseWheel>", _on_mousewheel)
-    
-    # Label para mostrar status de carregamento
-    loading_label = tk.Label(events_frame, text="Carregando eventos...", 
-                          font=("Arial", 10), fg=cores_atuais['cinza_texto'], bg=cores_atuais['branco'])
-    loading_label.pack(pady=10)
-    
-    # Para permitir arrastar a janela
-    def start_drag(event):
-        root._drag_start_x = event.x
-        root._drag_start_y = event.y
-    
-    def do_drag(event):
-        x = root.winfo_x() + event.x - root._drag_start_x
-        y = root.winfo_y() + event.y - root._drag_start_y
-        root.geometry(f"+{x}+{y}")
-    
-    # Permitir arrastar a partir do cabeçalho
-    header_frame.bind("<Button-1>", start_drag)
-    header_frame.bind("<B1-Motion>", do_drag)
-    title_label.bind("<Button-1>", start_drag)
-    title_label.bind("<B1-Motion>", do_drag)
-    icon_label.bind("<Button-1>", start_drag)
-    icon_label.bind("<B1-Motion>", do_drag)
-    
-    return root, events_frame, loading_label, eventos_count_label
-
-def cor_evento(color_id):
-    global cores_atuais
-    # Mapeamento de IDs de cores do Google Calendar para as cores reais
-    cores_calendar = {
-        '1': cores_atuais['azul'],     # Azul
-        '2': cores_atuais['verde'],    # Verde
-        '3': cores_atuais['vermelho'], # Vermelho
-        '4': '#9C27B0' if not modo_dark else '#CE93D8',  # Roxo
-        '5': '#FF5722' if not modo_dark else '#FFAB91',  # Laranja
-        '6': '#00BCD4' if not modo_dark else '#80DEEA',  # Ciano
-        '7': '#795548' if not modo_dark else '#BCAAA4',  # Marrom
-        '8': '#607D8B' if not modo_dark else '#B0BEC5',  # Cinza azulado
-        '9': cores_atuais['amarelo'],  # Amarelo
-        '10': '#8BC34A' if not modo_dark else '#C5E1A5',  # Verde claro
-        '11': '#009688' if not modo_dark else '#80CBC4',  # Verde azulado
-    }
-    return cores_calendar.get(color_id, cores_atuais['azul'])
-
-def nome_dia_semana(data_str):
-    """Retorna o nome do dia da semana a partir de uma string de data no formato DD/MM"""
-    try:
-        # Adicionar o ano atual à data para poder converter
-        ano_atual = datetime.now().year
-        data_completa = f"{data_str}/{ano_atual}"
-        data_obj = datetime.strptime(data_completa, '%d/%m/%Y')
-        
-        # Obter o nome do dia da semana
-        dia_semana = data_obj.strftime('%A')
-        
-        # Traduzir para português
-        traducoes = {
-            'Monday': 'Segunda',
-            'Tuesday': 'Terça',
-            'Wednesday': 'Quarta',
-            'Thursday': 'Quinta',
-            'Friday': 'Sexta',
-            'Saturday': 'Sábado',
-            'Sunday': 'Domingo'
-        }
-        
-        return traducoes.get(dia_semana, dia_semana)
-    except Exception as e:
-        print(f"Erro ao obter dia da semana: {e}")
-        return ""
-
-def exibir_eventos(events_frame, eventos, eventos_count_label):
-    global cores_atuais
-    # Limpar frame de eventos
-    for widget in events_frame.winfo_children():
-        widget.destroy()
-    
-    # Atualizar contador de eventos
-    total_eventos = len(eventos)
-    eventos_count_label.config(text=f"({total_eventos} eventos)")
-    
-    if not eventos:
-        empty_label = tk.Label(events_frame, text="Sem eventos para este mês.", 
-                            font=("Arial", 11), fg=cores_atuais['cinza_texto'], bg=cores_atuais['branco'])
-        empty_label.pack(pady=10)
-        return
-    
-    print(f"Total de eventos recuperados: {len(eventos)}")
-    
-    # Agrupar eventos por data
-    eventos_por_data = {}
-    for evento in eventos:
-        data = evento['data_curta']  # Formato mais curto (DD/MM)
-        if data not in eventos_por_data:
-            eventos_por_data[data] = []
-        eventos_por_data[data].append(evento)
-    
-    print(f"Datas diferentes: {len(eventos_por_data.keys())}")
-    
-    # Ordenar as datas
-    datas_ordenadas = sorted(eventos_por_data.keys(), 
-                           key=lambda d: datetime.strptime(d + f"/{datetime.now().year}", '%d/%m/%Y'))
-    
-    # Criar widgets para cada data e seus eventos
-    hoje = datetime.now().strftime('%d/%m')
-    amanha = (datetime.now() + timedelta(days=1)).strftime('%d/%m')
-    
-    for i, data in enumerate(datas_ordenadas):
-        eventos_do_dia = eventos_por_data[data]
-        
-        # Se não for o primeiro grupo, adiciona separador
-        if i > 0:
-            separator = tk.Frame(events_frame, height=1, bg=cores_atuais['cinza_claro'])
-            separator.pack(fill='x', pady=6)  # Espaçamento reduzido
-        
-        # Frame da data
-        date_frame = tk.Frame(events_frame, bg=cores_atuais['branco'])
-        date_frame.pack(fill='x', anchor='w', pady=(4, 0))  # Espaçamento reduzido
-        
-        # Label da data com dia da semana
-        if data == hoje:
-            data_texto = f"Hoje, {data}"
-        elif data == amanha:
-            data_texto = f"Amanhã, {data}"
-        else:
-            dia_semana = nome_dia_semana(data)
-            data_texto = f"{dia_semana}, {data}"
-        
-        # Adicionar número de eventos do dia
-        num_eventos = len(eventos_do_dia)
-        data_texto = f"{data_texto} ({num_eventos})"
-        
-        date_label = tk.Label(date_frame, text=data_texto, 
-                           font=("Arial", 10, "bold"), fg=cores_atuais['cinza_data'], bg=cores_atuais['branco'])
-        date_label.pack(anchor='w')
-        
-        print(f"Data {data}: {len(eventos_do_dia)} eventos")
-        
-        # Exibir cada evento do dia
-        for evento in eventos_do_dia:
-            event_frame = tk.Frame(events_frame, bg=cores_atuais['branco'])
-            event_frame.pack(fill='x', pady=2, anchor='w')  # Espaçamento reduzido
-            
-            # Frame para organizar o layout do evento
-            event_content_container = tk.Frame(event_frame, bg=cores_atuais['branco'])
-            event_content_container.pack(fill='x', expand=True)
-            
-            # Indicador de cor do evento
-            color_indicator = tk.Frame(event_content_container, width=4, 
-                                   bg=cor_evento(evento['cor']))
-            color_indicator.pack(side='left', fill='y', padx=(0, 6))  # Espaçamento reduzido
-            
-            # Conteúdo do evento
-            event_content = tk.Frame(event_content_container, bg=cores_atuais['branco'])
-            event_content.pack(side='left', fill='both', expand=True)
-            
-            # Título do evento
-            title_label = tk.Label(event_content, text=evento['titulo'], 
-                               font=("Arial", 10), fg=cores_atuais['cinza_texto'],  # Tamanho reduzido
-                               bg=cores_atuais['branco'], anchor='w', justify='left')
-            title_label.pack(fill='x', anchor='w')
-            
-            # Horário (se não for evento de dia inteiro)
-            if not evento['dia_inteiro']:
-                time_label = tk.Label(event_content, text=evento['hora'], 
-                                  font=("Arial", 9), fg=cores_atuais['cinza_data'],  # Tamanho reduzido
-                                  bg=cores_atuais['branco'], anchor='w', justify='left')
-                time_label.pack(fill='x', anchor='w')
-            else:
-                time_label = tk.Label(event_content, text="Dia inteiro", 
-                                  font=("Arial", 9), fg=cores_atuais['cinza_data'],  # Tamanho reduzido
-                                  bg=cores_atuais['branco'], anchor='w', justify='left')
-                time_label.pack(fill='x', anchor='w')
-
-def atualizar_widget(events_frame, service, eventos_count_label):
-    try:
-        # Buscar todos os eventos do mês
-        eventos_raw = buscar_eventos(service, max_results=100)
-        
-        # Converter para formato mais simples
-        eventos = [formatar_evento(e) for e in eventos_raw]
-        
-        # Ordenar eventos por data
-        eventos.sort(key=lambda e: e['data_obj'])
-        
-        # Exibir na interface
-        exibir_eventos(events_frame, eventos, eventos_count_label)
-    except Exception as e:
-        # Exibir mensagem de erro
-        for widget in events_frame.winfo_children():
-            widget.destroy()
-        error_label = tk.Label(events_frame, text=f"Erro ao atualizar: {str(e)}", 
-                            font=("Arial", 10), fg=cores_atuais['vermelho'], bg=cores_atuais['branco'])
-        error_label.pack(pady=10)
-        
-        # Exibir detalhes do erro no console
-        import traceback
-        traceback.print_exc()
-    
-    # Atualiza a cada 5 minutos
-    events_frame.after(5 * 60 * 1000, lambda: atualizar_widget(events_frame, service, eventos_count_label))
-
-def reconstruir_interface(root, callback=None):
-    # Chamar callback (como alternar_modo) antes de reconstruir
-    if callback:
-        callback()
-    
-    # Destruir a janela atual
-    root.destroy()
-    
-    # Reiniciar a interface
-    threading.Thread(target=iniciar_interface).start()
-
-def iniciar_interface():
-    try:
-        # Autenticar com Google Calendar
-        service = autenticar_google_calendar()
-        
-        # Criar a interface
-        root, events_frame, loading_label, eventos_count_label = criar_interface()
-        
-        # Iniciar a atualização dos eventos (após um curto delay para a interface carregar)
-        root.after(500, lambda: atualizar_widget(events_frame, service, eventos_count_label))
-        
-        # Iniciar loop principal
-        root.mainloop()
-    except Exception as e:
-        print(f"Erro ao iniciar: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-if __name__ == '__main__':
+import tkinter as tk
+from datetime import datetime, date
+import heapq
+from operator import attrgetter
+import threading
+
+# As bibliotecas do Google (em api_calendario) e PIL/requests (em cache_assets) são
+# importadas só quando usadas, na thread de sincronização, para não atrasar a primeira pintura.
+
+import cache_assets
+import fontes
+import instrumentacao
+import servidor_sync
+import sincronizacao
+import transporte
+from api_calendario import autenticar_google_calendar, credenciais, formatar_evento, listar_calendarios
+from armazenamento import ArmazenamentoEventos, carregar_snapshot, salvar_snapshot
+from lista_eventos import ListaEventosCanvas
+from janelas import TIPOS, CacheJanelas, JanelaTempo
+from indice_busca import IndiceBusca
+from indice_intervalos import IndiceIntervalos
+from lembretes import AgendaLembretes
+from modelo import DIAS_SEMANA, agora_em_minutos
+from tema import Tema
+
+# Ícone exibido no cabeçalho
+ICONE_URL = "https://ssl.gstatic.com/calendar/images/dynamiclogo_2020q4/calendar_17_2x.png"
+
+# Pausa na digitação (ms) antes de refiltrar a lista pela busca
+ATRASO_BUSCA = 150
+
+# Tempo (ms) que o popup de um lembrete fica na tela
+DURACAO_LEMBRETE = 15000
+
+# Intervalo (ms) da verificação da virada do dia (janela exibida acompanha "hoje")
+INTERVALO_VIRADA_DIA = 60 * 1000
+
+# Cores do Google Calendar
+CORES = {
+    'azul': '#4285F4',     # Azul principal do Google
+    'vermelho': '#EA4335', # Vermelho Google
+    'amarelo': '#FBBC05',  # Amarelo Google
+    'verde': '#34A853',    # Verde Google
+    'cinza_claro': '#F1F3F4', # Fundo claro do Google Calendar
+    'cinza_texto': '#3C4043',  # Cor padrão de texto
+    'cinza_data': '#5F6368',   # Cor secundária (data)
+    'branco': '#FFFFFF',
+}
+
+# Cores do modo escuro
+CORES_DARK = {
+    'azul': '#8AB4F8',     # Azul mais claro para modo escuro
+    'vermelho': '#F28B82', # Vermelho adaptado para modo escuro
+    'amarelo': '#FDD663',  # Amarelo adaptado para modo escuro
+    'verde': '#81C995',    # Verde adaptado para modo escuro
+    'cinza_claro': '#202124', # Fundo escuro do Google Calendar
+    'cinza_texto': '#E8EAED',  # Cor padrão de texto (claro)
+    'cinza_data': '#9AA0A6',   # Cor secundária (data) mais clara
+    'branco': '#2D2E30',     # Fundo dos cards
+}
+
+# Variável global para controlar o modo atual
+modo_dark = False
+cores_atuais = CORES
+
+# Widgets registrados com as chaves da paleta, recoloridos ao trocar de modo
+tema = Tema(cores_atuais)
+
+# Últimos eventos exibidos (reaproveitados ao trocar de tema, sem nova busca)
+ultimos_eventos = []
+
+# Índice de intervalos dos eventos exibidos (ocupação dos dias e "acontecendo agora"),
+# atualizado só com as diferenças a cada exibição, e o timer do próximo destaque
+indice_eventos = None
+timer_agora = None
+
+# Índice invertido para a busca no cabeçalho e o texto buscado ('' = sem filtro)
+indice_busca = IndiceBusca(
+    textos=lambda e: (e.titulo, e.local),
+    chave=lambda e: (e.calendario or '', e.id or ''),
+    versao=lambda e: (e.titulo, e.local))
+termo_busca = ''
+
+# Lembretes dos eventos de hoje em diante (um único timer, para o próximo disparo)
+agenda_lembretes = None
+
+# Momento em que os eventos exibidos foram obtidos da API
+dados_de = None
+
+# Janela de tempo exibida e cache LRU das janelas já buscadas
+janela_atual = JanelaTempo.atual('mes')
+cache_janelas = CacheJanelas()
+
+def alternar_modo():
+    global modo_dark, cores_atuais
+    modo_dark = not modo_dark
+    cores_atuais = CORES_DARK if modo_dark else CORES
+    # Recolore a interface existente no lugar
+    tema.aplicar(cores_atuais)
+
+def criar_botao_toggle(parent, is_on=False):
+    """Cria um botão de toggle estilo on/off"""
+    toggle_frame = tema.registrar(tk.Frame(parent, height=22, width=44), bg='branco')
+    toggle_frame.pack_propagate(False)  # Manter o tamanho fixo
+    
+    # Cores do botão
+    bg_on = "#34A853"  # Verde Google
+    bg_off = "#9AA0A6"  # Cinza do Google
+    
+    # Criar o botão toggle
+    toggle_button = tk.Frame(toggle_frame, width=44, height=22, bg=bg_on if is_on else bg_off, cursor="hand2")
+    toggle_button.pack(fill="both", expand=True)
+    toggle_button.pack_propagate(False)
+    
+    # Botão deslizante
+    slider = tema.registrar(tk.Frame(toggle_button, width=18, height=18, 
+                                     highlightthickness=0, bd=0), bg='branco')
+    slider.place(x=22 if is_on else 4, y=2)
+    
+    # Texto de status
+    text_var = tk.StringVar(value="ON" if is_on else "OFF")
+    status_text = tema.registrar(tk.Label(toggle_button, textvariable=text_var,
+                                          bg=bg_on if is_on else bg_off, font=("Arial", 8, "bold")),
+                                 fg='branco')
+    status_text.place(x=6 if is_on else 20, y=2)
+    
+    def toggle():
+        nonlocal is_on
+        is_on = not is_on
+        if is_on:
+            toggle_button.config(bg=bg_on)
+            status_text.config(bg=bg_on)
+            slider.place(x=22, y=2)
+            text_var.set("ON")
+            status_text.place(x=6, y=2)
+        else:
+            toggle_button.config(bg=bg_off)
+            status_text.config(bg=bg_off)
+            slider.place(x=4, y=2)
+            text_var.set("OFF")
+            status_text.place(x=20, y=2)
+        
+        # Chamar a função de alternar modo
+        alternar_modo()
+    
+    # Vincular o evento de clique
+    toggle_button.bind("<Button-1>", lambda e: toggle())
+    slider.bind("<Button-1>", lambda e: toggle())
+    status_text.bind("<Button-1>", lambda e: toggle())
+    
+    return toggle_frame
+
+def criar_interface():
+    global cores_atuais, dados_de, agenda_lembretes
+    # Criar janela principal
+    root = tk.Tk()
+    root.overrideredirect(True)  # sem bordas
+    root.attributes('-topmost', False)
+    root.after(10, lambda: root.wm_attributes("-topmost", False))
+    root.geometry("+50+50")  # posição na tela
+    
+    # Lembretes alimentados pelos eventos exibidos (sem consultas extras à API)
+    agenda_lembretes = AgendaLembretes(root.after, root.after_cancel,
+                                       lambda evento, antecedencia: mostrar_lembrete(root, evento, antecedencia))
+    
+    # Configurar estilo
+    tema.registrar(root, bg='cinza_claro')
+    
+    # Frame principal com bordas arredondadas e sombra - TAMANHO REDUZIDO
+    main_frame = tema.registrar(tk.Frame(root, padx=10, pady=10), bg='branco')
+    main_frame.pack(padx=6, pady=6)
+    
+    # Cabeçalho com ícone e título
+    header_frame = tema.registrar(tk.Frame(main_frame), bg='branco')
+    header_frame.pack(fill='x', pady=(0, 8))
+    
+    # Ícone do Google Calendar, lido do cache local (baixado/revalidado em segundo plano)
+    try:
+        caminho_icone = cache_assets.obter_imagem(ICONE_URL, (20, 20))  # Tamanho reduzido
+        if caminho_icone is None:
+            raise FileNotFoundError("ícone ainda não está em cache")
+        photo = tk.PhotoImage(file=caminho_icone)
+        icon_label = tema.registrar(tk.Label(header_frame, image=photo), bg='branco')
+        icon_label.image = photo
+        icon_label.pack(side='left', padx=(0, 6))  # Espaçamento reduzido
+    except (OSError, tk.TclError):
+        # Se o ícone não estiver disponível, usa um label de texto
+        icon_label = tema.registrar(tk.Label(header_frame, text="📅", font=("Arial", 14)), bg='branco', fg='azul')
+        icon_label.pack(side='left', padx=(0, 6))
+    
+    # Navegação entre janelas (‹ anterior, título, próxima ›)
+    anterior_label = tema.registrar(tk.Label(header_frame, text="‹", font=("Arial", 12, "bold"), cursor="hand2"),
+                                    bg='branco', fg='azul')
+    anterior_label.pack(side='left')
+    
+    # Título com a janela exibida (duplo clique alterna entre mês, semana e próximos dias)
+    title_label = tema.registrar(tk.Label(header_frame, text=f"Agenda - {janela_atual.titulo()}", font=("Arial", 12, "bold")), 
+                                 bg='branco', fg='azul')
+    title_label.pack(side='left')
+    
+    proxima_label = tema.registrar(tk.Label(header_frame, text="›", font=("Arial", 12, "bold"), cursor="hand2"),
+                                   bg='branco', fg='azul')
+    proxima_label.pack(side='left')
+    
+    # Adicionar contador de eventos (inicialmente vazio)
+    eventos_count_label = tema.registrar(tk.Label(header_frame, text="", font=("Arial", 10)), 
+                                         bg='branco', fg='cinza_texto')
+    eventos_count_label.pack(side='left', padx=(8, 0))
+    
+    # Frame para o modo dark
+    dark_mode_frame = tema.registrar(tk.Frame(header_frame), bg='branco')
+    dark_mode_frame.pack(side='right', padx=(0, 6))
+    
+    # Label para o texto "Dark"
+    dark_label = tema.registrar(tk.Label(dark_mode_frame, text="Dark", font=("Arial", 10)), 
+                                bg='branco', fg='cinza_texto')
+    dark_label.pack(side='left', padx=(0, 4))
+    
+    # Botão toggle
+    toggle_button = criar_botao_toggle(dark_mode_frame, modo_dark)
+    toggle_button.pack(side='left')
+    
+    # Botão fechar (X)
+    close_button = tema.registrar(tk.Label(header_frame, text="✕", font=("Arial", 12)), 
+                                  bg='branco', fg='cinza_texto')
+    close_button.pack(side='right', padx=(6, 0))
+    close_button.bind("<Button-1>", lambda e: root.destroy())
+    
+    # Busca: filtra a lista enquanto se digita
+    busca_frame = tema.registrar(tk.Frame(main_frame), bg='branco')
+    busca_frame.pack(fill='x', pady=(0, 8))
+    tema.registrar(tk.Label(busca_frame, text="🔍", font=("Arial", 10)),
+                   bg='branco', fg='cinza_data').pack(side='left', padx=(0, 4))
+    busca_entry = tema.registrar(tk.Entry(busca_frame, font=("Arial", 10), relief='flat'),
+                                 bg='cinza_claro', fg='cinza_texto', insertbackground='cinza_texto')
+    busca_entry.pack(side='left', fill='x', expand=True, ipady=2)
+    
+    # Separador
+    separator = tema.registrar(tk.Frame(main_frame, height=1), bg='cinza_claro')
+    separator.pack(fill='x', pady=(0, 8))
+    
+    # Frame para conter os eventos com rolagem de mouse (sem scrollbar)
+    events_container_frame = tema.registrar(tk.Frame(main_frame), bg='branco')
+    events_container_frame.pack(fill='both', expand=True)
+    
+    # Canvas onde a lista de eventos é desenhada (virtualizada, só as linhas visíveis)
+    canvas = tema.registrar(tk.Canvas(events_container_frame, highlightthickness=0, 
+                                      width=320, height=400), bg='branco')
+    canvas.pack(fill='both', expand=True)
+    lista = ListaEventosCanvas(canvas, cores_atuais, largura=320)
+    
+    # Configurar rolagem com mouse
+    def _on_mousewheel(event):
+        lista.rolar(int(-1*(event.delta/120)))
+    
+    canvas.bind_all("<MouseWheel>", _on_mousewheel)
+    
+    # Painel de diagnóstico (F12): latência de cada fase, escondido por padrão
+    criar_painel_diagnostico(root, main_frame)
+    
+    # Linha de status (ex.: dados desatualizados), exibida só quando necessário
+    status_label = tema.registrar(tk.Label(main_frame, text="", font=("Arial", 8)),
+                                  bg='branco', fg='cinza_data')
+    status_label.separador = separator
+    
+    # Pintar imediatamente o último snapshot salvo (se for da janela exibida, e não
+    # do mês passado); a thread de sincronização revalida em seguida
+    snapshot = carregar_snapshot(janela_atual.intervalo())
+    if snapshot:
+        dados_de, eventos = snapshot
+        ultimos_eventos[:] = eventos
+        exibir_eventos(lista, eventos, eventos_count_label)
+        mostrar_status(status_label, f"Desatualizado desde {dados_de.strftime('%H:%M')}")
+    else:
+        # Mostrar status de carregamento
+        lista.mensagem("Carregando eventos...", 'cinza_texto')
+    
+    # Para permitir arrastar a janela
+    def start_drag(event):
+        root._drag_start_x = event.x
+        root._drag_start_y = event.y
+    
+    def do_drag(event):
+        x = root.winfo_x() + event.x - root._drag_start_x
+        y = root.winfo_y() + event.y - root._drag_start_y
+        root.geometry(f"+{x}+{y}")
+    
+    # Permitir arrastar a partir do cabeçalho
+    header_frame.bind("<Button-1>", start_drag)
+    header_frame.bind("<B1-Motion>", do_drag)
+    title_label.bind("<Button-1>", start_drag)
+    title_label.bind("<B1-Motion>", do_drag)
+    icon_label.bind("<Button-1>", start_drag)
+    icon_label.bind("<B1-Motion>", do_drag)
+    
+    return (root, lista, eventos_count_label, status_label,
+            (anterior_label, title_label, proxima_label), busca_entry)
+
+def criar_painel_diagnostico(root, main_frame):
+    """
+    Painel escondido com a última latência e o p95 de cada fase medida pela
+    instrumentação, mais os contadores de rede; F12 mostra/esconde. Enquanto visível, atualiza a cada segundo.
+    """
+    painel = tema.registrar(tk.Label(main_frame, text="", font=("Courier", 8), justify='left'),
+                            bg='cinza_claro', fg='cinza_texto')
+    
+    def atualizar():
+        if not painel.winfo_manager():
+            return
+        linhas = [f"{'fase':12s} {'última':>8s} {'p95':>8s} {'n':>4s}"]
+        for fase, ultima, p95, amostras in instrumentacao.estatisticas():
+            linhas.append(f"{fase:12s} {ultima:6.1f}ms {p95:6.1f}ms {amostras:4d}")
+        rede = transporte.estatisticas()
+        linhas.append(f"rede: {rede['requisicoes']} req, {rede['conexoes']} conexões "
+                      f"({rede['reaproveitadas']} reaprov.), {rede['bytes'] / 1024:.0f} KB")
+        painel.config(text="\n".join(linhas))
+        painel.after(1000, atualizar)
+    
+    def alternar(event=None):
+        if painel.winfo_manager():
+            painel.pack_forget()
+        else:
+            painel.pack(side='bottom', fill='x', pady=(8, 0))
+            atualizar()
+    
+    root.bind('<F12>', alternar)
+    return painel
+
+def mostrar_lembrete(root, evento, antecedencia):
+    """Popup abaixo do widget com o lembrete; some sozinho ou com um clique."""
+    popup = tk.Toplevel(root)
+    popup.overrideredirect(True)
+    popup.attributes('-topmost', True)
+    quadro = tk.Frame(popup, bg=cores_atuais['branco'], padx=10, pady=8, highlightthickness=2,
+                      highlightbackground=cor_evento(evento.cor))
+    quadro.pack()
+    if antecedencia == 0:
+        quando = "Começando agora"
+    elif antecedencia % 1440 == 0:
+        quando = f"Em {antecedencia // 1440} dia(s)"
+    elif antecedencia % 60 == 0:
+        quando = f"Em {antecedencia // 60} h"
+    else:
+        quando = f"Em {antecedencia} min"
+    horario = "Dia inteiro" if evento.dia_inteiro else evento.hora
+    tk.Label(quadro, text=evento.titulo, font=("Arial", 10, "bold"), bg=cores_atuais['branco'],
+             fg=cores_atuais['cinza_texto'], wraplength=280, justify='left').pack(anchor='w')
+    tk.Label(quadro, text=f"{quando} · {horario}", font=("Arial", 9), bg=cores_atuais['branco'],
+             fg=cores_atuais['cinza_data']).pack(anchor='w')
+    popup.geometry(f"+{root.winfo_x()}+{root.winfo_y() + root.winfo_height() + 8}")
+    for widget in (popup, quadro, *quadro.winfo_children()):
+        widget.bind("<Button-1>", lambda e: popup.destroy())
+    popup.after(DURACAO_LEMBRETE, popup.destroy)
+    root.bell()
+
+def mostrar_status(status_label, texto):
+    """Exibe a linha de status abaixo do cabeçalho, ou a esconde se texto for None."""
+    if texto is None:
+        if status_label.winfo_manager():
+            status_label.pack_forget()
+        return
+    if status_label.cget('text') != texto:
+        status_label.config(text=texto)
+    if not status_label.winfo_manager():
+        status_label.pack(anchor='w', pady=(0, 4), before=status_label.separador)
+
+def cor_evento(color_id):
+    global cores_atuais
+    # Mapeamento de IDs de cores do Google Calendar para as cores reais
+    cores_calendar = {
+        '1': cores_atuais['azul'],     # Azul
+        '2': cores_atuais['verde'],    # Verde
+        '3': cores_atuais['vermelho'], # Vermelho
+        '4': '#9C27B0' if not modo_dark else '#CE93D8',  # Roxo
+        '5': '#FF5722' if not modo_dark else '#FFAB91',  # Laranja
+        '6': '#00BCD4' if not modo_dark else '#80DEEA',  # Ciano
+        '7': '#795548' if not modo_dark else '#BCAAA4',  # Marrom
+        '8': '#607D8B' if not modo_dark else '#B0BEC5',  # Cinza azulado
+        '9': cores_atuais['amarelo'],  # Amarelo
+        '10': '#8BC34A' if not modo_dark else '#C5E1A5',  # Verde claro
+        '11': '#009688' if not modo_dark else '#80CBC4',  # Verde azulado
+    }
+    if color_id.startswith('#'):
+        # Cor hexadecimal herdada do calendário
+        return color_id
+    return cores_calendar.get(color_id, cores_atuais['azul'])
+
+def nome_dia_semana(dia):
+    """Retorna o nome do dia da semana (em português) de uma data ordinal"""
+    return DIAS_SEMANA[date.fromordinal(dia).weekday()]
+
+def exibir_eventos(lista, eventos, eventos_count_label, sincronizar=True):
+    global indice_eventos, timer_agora
+    if timer_agora is not None:
+        lista.canvas.after_cancel(timer_agora)
+        timer_agora = None
+    
+    with instrumentacao.span('agrupamento', eventos=len(eventos)) as dados:
+        if sincronizar:
+            # Os índices recebem só as diferenças em relação à exibição anterior
+            if indice_eventos is None:
+                indice_eventos = novo_indice()
+            dados['alterados'] = indice_eventos.sincronizar(eventos)
+            indice_busca.sincronizar(eventos)
+            if agenda_lembretes is not None and janela_atual.contem(date.today()):
+                # Só janelas com o dia de hoje trazem os próximos eventos; nas
+                # outras, os lembretes continuam os da última janela assim
+                agenda_lembretes.sincronizar(eventos)
+        filtro = indice_busca.buscar(termo_busca)
+        agora = agora_em_minutos()
+        linhas = montar_linhas(eventos, indice_eventos, janela_atual, agora, filtro) if eventos else []
+    
+    # Atualizar contador de eventos (só toca no widget se o texto mudou)
+    total_eventos = len(eventos)
+    if filtro is None:
+        texto_contador = f"({total_eventos} eventos)"
+    else:
+        texto_contador = f"({len(filtro)} de {total_eventos} eventos)"
+    if eventos_count_label.cget('text') != texto_contador:
+        eventos_count_label.config(text=texto_contador)
+    
+    if not eventos:
+        lista.mensagem("Sem eventos neste período.", 'cinza_texto')
+        return
+    if filtro is not None and not filtro:
+        lista.mensagem("Nenhum evento encontrado.", 'cinza_texto')
+        return
+    
+    # A lista compara com as linhas atuais e só altera o que mudou; o layout
+    # pendente do Tk entra na medição para separar custo de desenho e de rede
+    with instrumentacao.span('render', linhas=len(linhas)):
+        lista.definir_linhas(linhas)
+        lista.canvas.update_idletasks()
+    
+    # Redesenhar quando algum evento começar ou terminar (muda o destaque)
+    proximo = indice_eventos.proximo_limite(agora)
+    if proximo is not None:
+        espera = ((proximo - agora) * 60 - datetime.now().second) * 1000
+        timer_agora = lista.canvas.after(
+            max(espera, 1000), lambda: exibir_eventos(lista, ultimos_eventos, eventos_count_label))
+
+def novo_indice(eventos=()):
+    """Índice de intervalos de eventos, em minutos locais (fim exclusivo)."""
+    indice = IndiceIntervalos(
+        intervalo=lambda e: (e.inicio_min, e.fim_ordem),
+        chave=lambda e: (e.calendario or '', e.id or ''),
+        versao=lambda e: (e.atualizado, e.cor, e.ordem, e.fim_ordem))
+    indice.sincronizar(eventos)
+    return indice
+
+def montar_linhas(eventos, indice=None, janela=None, agora=None, filtro=None):
+    """
+    Monta as linhas da lista (separadores, cabeçalhos de data e eventos).
+    Cada dia da janela lista os eventos que o ocupam, consultados no índice de
+    intervalos: eventos de vários dias aparecem em todos eles, e os que estão
+    acontecendo em `agora` (minutos locais) são destacados. Com `filtro` (chaves
+    (calendario, id) de uma busca), só esses eventos são listados.
+    """
+    if indice is None:
+        indice = novo_indice(eventos)
+    if janela is not None:
+        primeiro, ultimo = janela.inicio.toordinal(), janela.fim.toordinal()
+    elif eventos:
+        primeiro = min(e.dia for e in eventos)
+        ultimo = max(e.fim_ordem for e in eventos) // 1440
+    else:
+        return []
+    em_andamento = set()
+    if agora is not None:
+        em_andamento = {id(e) for e in indice.no_ponto(agora)}
+    hoje = date.today().toordinal()
+    cores = {}  # colorId -> cor resolvida (cor_evento depende só do id e do tema)
+    
+    linhas = []
+    for dia in range(primeiro, ultimo + 1):
+        eventos_do_dia = indice.sobrepostos(dia * 1440, (dia + 1) * 1440)
+        if filtro is not None:
+            eventos_do_dia = [e for e in eventos_do_dia
+                              if (e.calendario or '', e.id or '') in filtro]
+        if not eventos_do_dia:
+            continue
+        eventos_do_dia.sort(key=attrgetter('ordem'))
+        d = date.fromordinal(dia)
+        data = f"{d.day:02d}/{d.month:02d}"  # Formato mais curto (DD/MM)
+        
+        # Se não for o primeiro grupo, adiciona separador
+        if linhas:
+            linhas.append((('separador', dia), None, 'separador', None))
+        
+        # Label da data com dia da semana
+        if dia == hoje:
+            data_texto = f"Hoje, {data}"
+        elif dia == hoje + 1:
+            data_texto = f"Amanhã, {data}"
+        else:
+            data_texto = f"{nome_dia_semana(dia)}, {data}"
+        
+        # Adicionar número de eventos do dia
+        data_texto = f"{data_texto} ({len(eventos_do_dia)})"
+        linhas.append((('data', dia), data_texto, 'data', data_texto))
+        
+        # Uma linha para cada evento do dia (horário ou "Dia inteiro"),
+        # identificada pelo id do evento e versionada pelo campo 'updated'
+        for evento in eventos_do_dia:
+            horario = horario_no_dia(evento, dia)
+            cor = cores.get(evento.cor)
+            if cor is None:
+                cor = cores[evento.cor] = cor_evento(evento.cor)
+            agora_flag = id(evento) in em_andamento
+            dados = (evento.titulo, horario, cor, agora_flag)
+            chave = ('evento', evento.calendario, evento.id, dia)
+            versao = (evento.atualizado, horario, agora_flag) if evento.atualizado else dados
+            linhas.append((chave, versao, 'evento', dados))
+    
+    return linhas
+
+def horario_no_dia(evento, dia):
+    """Texto de horário do evento no dia `dia`, considerando eventos de vários dias."""
+    if evento.dia_inteiro:
+        return "Dia inteiro"
+    ultimo = evento.fim_dia
+    if dia == evento.dia:
+        return evento.hora if ultimo == dia else f"{evento.hora} - {date.fromordinal(ultimo).strftime('%d/%m')}"
+    if dia == ultimo:
+        return f"até {evento.hora_fim}"
+    return "Dia inteiro"
+
+def preparar_sincronizacao():
+    """
+    Executado na thread de sincronização: autentica, descobre os calendários e
+    monta as fontes (a conta, com o armazenamento sincronizado, e os arquivos
+    .ics locais de PYGOOGLECAL_ICS).
+    """
+    service = autenticar_google_calendar()
+    conta = fontes.FonteGoogle(service, listar_calendarios(service), ArmazenamentoEventos())
+    return {'fontes': [conta, *fontes.fontes_locais()]}
+
+def carregar_eventos(contexto, janela):
+    """
+    Executado na thread de sincronização: busca e converte os eventos da janela.
+    Janelas dentro do mês atual vêm do armazenamento sincronizado; as demais são
+    buscadas em cada fonte e guardadas no cache de janelas.
+    Retorna None se nada mudou desde a última carga da mesma janela.
+    """
+    mesma_janela = contexto.get('janela') == janela
+    # Normalmente já renovado pela thread das credenciais; nunca durante um execute()
+    credenciais.garantir_valida()
+    mes_atual = JanelaTempo.atual('mes')
+    
+    if janela.dentro_de(mes_atual):
+        versao_anterior = contexto.get('versao')
+        
+        # Sincronizar o mês de todos os calendários (incremental); sem mudanças, nem lê o SQLite
+        fontes.sincronizar(contexto['fontes'])
+        versao = fontes.versao(contexto['fontes'])
+        if mesma_janela and versao == versao_anterior:
+            return None
+        eventos_raw = fontes.eventos(contexto['fontes'], *janela.intervalo())
+        
+        # Converter para o registro compacto e ordenar pela chave pré-calculada
+        # (o armazenamento já devolve quase tudo em ordem, então a ordenação é barata)
+        with instrumentacao.span('conversao', eventos=len(eventos_raw)):
+            eventos = [formatar_evento(e) for e in eventos_raw]
+            eventos.sort(key=attrgetter('ordem'))
+        _guardar_no_cache(todos_calendarios(contexto), janela, eventos)
+        
+        if janela == mes_atual:
+            # Guardar para a próxima abertura do widget (stale-while-revalidate)
+            salvar_snapshot(eventos, janela.intervalo())
+        # Só depois de convertidos: se algo falhar antes, a próxima carga refaz tudo
+        contexto['versao'] = versao
+    else:
+        eventos = _eventos_da_janela(contexto, janela, usar_cache=False)
+        assinatura = [(e.calendario, e.id, e.atualizado) for e in eventos]
+        if mesma_janela and assinatura == contexto.get('assinatura'):
+            return None
+        contexto['assinatura'] = assinatura
+    
+    contexto['janela'] = janela
+    return eventos
+
+def prefetch_vizinhos(contexto, janela):
+    """Executado na thread de sincronização: deixa as janelas vizinhas no cache."""
+    mes_atual = JanelaTempo.atual('mes')
+    for vizinha in (janela.proxima(), janela.anterior()):
+        if not vizinha.dentro_de(mes_atual):
+            _eventos_da_janela(contexto, vizinha, usar_cache=True)
+
+def todos_calendarios(contexto):
+    """IDs dos calendários exibidos, de todas as fontes."""
+    return fontes.calendarios(contexto['fontes'])
+
+def eventos_em_cache(calendar_ids, janela):
+    """Eventos da janela já mesclados, se todos os calendários estiverem no cache; senão None."""
+    inicio, fim = janela.intervalo()
+    listas = [cache_janelas.obter((calendar_id, inicio, fim)) for calendar_id in calendar_ids]
+    if any(lista is None for lista in listas):
+        return None
+    return list(heapq.merge(*listas, key=attrgetter('ordem')))
+
+def _eventos_da_janela(contexto, janela, usar_cache):
+    """Eventos da janela fora do mês sincronizado: do cache ou buscados nas fontes."""
+    if usar_cache:
+        eventos = eventos_em_cache(todos_calendarios(contexto), janela)
+        if eventos is not None:
+            return eventos
+    brutos = fontes.eventos(contexto['fontes'], *janela.intervalo())
+    with instrumentacao.span('conversao', janela=repr(janela)) as dados:
+        eventos = [formatar_evento(e) for e in brutos]
+        eventos.sort(key=attrgetter('ordem'))
+        dados['eventos'] = len(eventos)
+    _guardar_no_cache(todos_calendarios(contexto), janela, eventos)
+    return eventos
+
+def _guardar_no_cache(calendar_ids, janela, eventos):
+    """Guarda os eventos (já ordenados) no cache, separados por calendário."""
+    inicio, fim = janela.intervalo()
+    por_calendario = {calendar_id: [] for calendar_id in calendar_ids}
+    for evento in eventos:
+        por_calendario.setdefault(evento.calendario, []).append(evento)
+    for calendar_id, lista in por_calendario.items():
+        cache_janelas.guardar((calendar_id, inicio, fim), lista)
+
+def atualizar_widget(lista, trabalhador, eventos_count_label, status_label):
+    """Drena as mensagens da thread de sincronização e atualiza a interface."""
+    global dados_de
+    for tipo, dados in trabalhador.drenar():
+        if tipo == sincronizacao.CARREGANDO:
+            # Com eventos na tela (inclusive do snapshot), a lista continua visível
+            if not ultimos_eventos:
+                lista.mensagem("Carregando eventos...", 'cinza_texto')
+        elif tipo == sincronizacao.EVENTOS:
+            janela, eventos = dados
+            if janela != janela_atual:
+                # Resultado de uma janela da qual o usuário já saiu
+                continue
+            # Exibir na interface
+            ultimos_eventos[:] = eventos
+            dados_de = datetime.now()
+            exibir_eventos(lista, eventos, eventos_count_label)
+            mostrar_status(status_label, None)
+        elif tipo == sincronizacao.SEM_MUDANCAS:
+            dados_de = datetime.now()
+            mostrar_status(status_label, None)
+        elif tipo == sincronizacao.ERRO:
+            if ultimos_eventos:
+                # Manter os últimos eventos na tela (uso offline); os pintados do
+                # cache de janelas antes da primeira carga não têm horário
+                desde = f" - dados de {dados_de.strftime('%H:%M')}" if dados_de is not None else ""
+                mostrar_status(status_label, f"Erro ao atualizar{desde}")
+            else:
+                # Exibir mensagem de erro
+                eventos_count_label.config(text="")
+                lista.mensagem(f"Erro ao atualizar: {dados}", 'vermelho')
+    
+    # Verifica novas mensagens em breve, sem nunca bloquear o loop do Tk
+    lista.canvas.after(100, lambda: atualizar_widget(lista, trabalhador, eventos_count_label, status_label))
+
+def iniciar_interface():
+    try:
+        # Criar a interface
+        root, lista, eventos_count_label, status_label, navegacao, busca_entry = criar_interface()
+        
+        # Com o serviço local rodando (servidor_sync.py), os eventos vêm dele; senão a
+        # autenticação e as chamadas à API ficam na thread de sincronização (intervalo adaptativo)
+        trabalhador = servidor_sync.conectar(janela_atual)
+        if trabalhador is None:
+            trabalhador = sincronizacao.TrabalhadorSincronizacao(
+                preparar_sincronizacao, carregar_eventos, janela_atual, prefetch_vizinhos)
+        trabalhador.start()
+        
+        # Navegação: pinta do cache na hora (se houver) e pede a carga à thread de sincronização
+        anterior_label, title_label, proxima_label = navegacao
+        
+        def ir_para(janela):
+            global janela_atual
+            janela_atual = janela
+            title_label.config(text=f"Agenda - {janela.titulo()}")
+            eventos = None
+            if trabalhador.contexto is not None:
+                eventos = eventos_em_cache(todos_calendarios(trabalhador.contexto), janela)
+            if eventos is not None:
+                ultimos_eventos[:] = eventos
+                exibir_eventos(lista, eventos, eventos_count_label)
+            else:
+                ultimos_eventos[:] = []
+                eventos_count_label.config(text="")
+                lista.mensagem("Carregando eventos...", 'cinza_texto')
+            trabalhador.definir_janela(janela)
+        
+        def alternar_tipo():
+            proximo = TIPOS[(TIPOS.index(janela_atual.tipo) + 1) % len(TIPOS)]
+            ir_para(janela_atual.com_tipo(proximo))
+        
+        anterior_label.bind("<Button-1>", lambda e: ir_para(janela_atual.anterior()))
+        proxima_label.bind("<Button-1>", lambda e: ir_para(janela_atual.proxima()))
+        title_label.bind("<Double-Button-1>", lambda e: alternar_tipo())
+        
+        # Virada do dia (ou volta da suspensão em outro dia): se a janela exibida
+        # tinha o dia anterior, passa para a que tem hoje (o mês novo no dia 1º,
+        # os próximos dias a partir de hoje); se o usuário navegou, fica onde está
+        ultimo_dia = [date.today()]
+        
+        def acompanhar_dia():
+            anterior, ultimo_dia[0] = ultimo_dia[0], date.today()
+            if ultimo_dia[0] != anterior and janela_atual.contem(anterior):
+                nova = JanelaTempo(janela_atual.tipo, ultimo_dia[0], janela_atual.dias)
+                if nova != janela_atual:
+                    ir_para(nova)
+            root.after(INTERVALO_VIRADA_DIA, acompanhar_dia)
+        root.after(INTERVALO_VIRADA_DIA, acompanhar_dia)
+        root.after(100, lambda: atualizar_widget(lista, trabalhador, eventos_count_label, status_label))
+        
+        # Busca: refiltra só quando a digitação pausa (debounce), sem mexer nos índices
+        pendente = [None]
+        
+        def aplicar_busca():
+            global termo_busca
+            pendente[0] = None
+            if busca_entry.get() == termo_busca:
+                return
+            termo_busca = busca_entry.get()
+            if ultimos_eventos:
+                exibir_eventos(lista, ultimos_eventos, eventos_count_label, sincronizar=False)
+                lista.ir_para_topo()
+        
+        def ao_digitar(event):
+            if pendente[0] is not None:
+                root.after_cancel(pendente[0])
+            pendente[0] = root.after(ATRASO_BUSCA, aplicar_busca)
+        
+        def limpar_busca(event):
+            busca_entry.delete(0, 'end')
+            aplicar_busca()
+        
+        busca_entry.bind('<KeyRelease>', ao_digitar)
+        busca_entry.bind('<Escape>', limpar_busca)
+        
+        # Ao ganhar foco, atualizar logo (respeitando o backoff e o intervalo mínimo)
+        root.bind('<FocusIn>', lambda e: trabalhador.solicitar_atualizacao(oportunista=True))
+        
+        # Ao trocar de tema: redesenhar a lista com os eventos em memória (sem rede)
+        def _ao_mudar_tema(cores):
+            if ultimos_eventos:
+                exibir_eventos(lista, ultimos_eventos, eventos_count_label)
+            lista.definir_cores(cores)
+        tema.ao_mudar(_ao_mudar_tema)
+        
+        # Iniciar loop principal
+        root.mainloop()
+        trabalhador.parar()
+        credenciais.parar()
+    except Exception as e:
+        instrumentacao.aviso(f"Erro ao iniciar: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == '__main__':
     threading.Thread(target=iniciar_interface).start()
\ No newline at end of file
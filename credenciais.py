@@ -0,0 +1,170 @@
+"""
+Credenciais OAuth do widget, compartilhadas entre processos.
+O token fica no diretório de configuração do usuário e é sempre lido e gravado
+sob um lock de arquivo (fcntl no Linux/macOS, msvcrt no Windows); a gravação é
+atômica (armazenamento.gravar_atomico). Uma thread renova o access token
+pouco antes de expirar, para que as chamadas à API nunca paguem a renovação.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import instrumentacao
+import transporte
+from armazenamento import diretorio_config, gravar_atomico
+
+# Renovar quando faltar menos que isso (s) para expirar; maior que a margem de
+# 3m45s da google-auth, para que a renovação nunca aconteça durante um execute()
+ANTECEDENCIA = 5 * 60
+
+# Espera máxima (s) entre verificações, para reagir a suspensões do computador
+VERIFICAR_A_CADA = 60
+
+# Arquivo de token usado por versões anteriores (no diretório atual)
+TOKEN_LEGADO = 'token.json'
+
+
+def caminho_token():
+    return os.path.join(diretorio_config(), 'token.json')
+
+
+@contextmanager
+def travar(caminho):
+    """Lock exclusivo entre processos associado a `caminho` (em `caminho`.lock)."""
+    with open(caminho + '.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _agora_utc():
+    # A google-auth usa datetimes UTC sem fuso em `expiry`
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class GerenciadorCredenciais:
+    """
+    Dono das credenciais do processo. `obter()` devolve credenciais válidas
+    (fazendo login na primeira vez); `iniciar()` liga a renovação em segundo
+    plano. O objeto de credenciais é sempre o mesmo e é atualizado no lugar,
+    então o service construído com ele passa a usar o token novo sozinho.
+    """
+
+    def __init__(self, escopos, caminho=None, segredos='credentials.json'):
+        self.escopos = escopos
+        self._caminho = caminho
+        self.segredos = segredos
+        self.creds = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    @property
+    def caminho(self):
+        # Resolvido só no uso, para não criar o diretório de configuração na importação
+        return self._caminho or caminho_token()
+
+    def obter(self):
+        """Credenciais válidas, lidas do disco, renovadas ou obtidas por login."""
+        with self._lock:
+            if self.creds is None:
+                self.creds = self._ler()
+            if self.creds is None or not self._valida(self.creds, 0):
+                self._renovar()
+            return self.creds
+
+    def garantir_valida(self):
+        """Chamado antes de cada sincronização: renova já se a thread não o fez a tempo."""
+        with self._lock:
+            if self.creds is not None and not self._valida(self.creds, ANTECEDENCIA):
+                self._renovar()
+        return self.creds
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name='credenciais', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            espera = VERIFICAR_A_CADA
+            try:
+                with self._lock:
+                    restante = self._segundos_ate_expirar(self.creds)
+                    if restante is not None and restante <= ANTECEDENCIA:
+                        self._renovar()
+                        restante = self._segundos_ate_expirar(self.creds)
+                if restante is not None:
+                    espera = min(VERIFICAR_A_CADA, max(restante - ANTECEDENCIA, 1))
+            except Exception as e:
+                instrumentacao.aviso(f"Erro ao renovar o token: {e}")
+            self._parar.wait(espera)
+
+    def _renovar(self):
+        """
+        Sob o lock do arquivo: adota o token do disco se outro processo já o
+        renovou; senão renova (ou faz login) e grava o resultado.
+        """
+        from google.auth.transport.requests import Request
+
+        with travar(self.caminho):
+            do_disco = self._ler()
+            if do_disco is not None and self._valida(do_disco, ANTECEDENCIA):
+                self._adotar(do_disco)
+                return
+            if self.creds is None:
+                self.creds = do_disco
+            if self.creds is not None and self.creds.refresh_token:
+                self.creds.refresh(Request(transporte.sessao()))
+            else:
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                flow = InstalledAppFlow.from_client_secrets_file(self.segredos, self.escopos)
+                self.creds = flow.run_local_server(port=0)
+            gravar_atomico(self.caminho, self.creds.to_json())
+
+    def _adotar(self, outras):
+        if self.creds is None:
+            self.creds = outras
+            return
+        self.creds.token = outras.token
+        self.creds.expiry = outras.expiry
+
+    def _ler(self):
+        from google.oauth2.credentials import Credentials
+
+        for caminho in (self.caminho, TOKEN_LEGADO):
+            if os.path.exists(caminho):
+                return Credentials.from_authorized_user_file(caminho, self.escopos)
+        return None
+
+    @staticmethod
+    def _segundos_ate_expirar(creds):
+        if creds is None or creds.expiry is None:
+            return None
+        return (creds.expiry - _agora_utc()).total_seconds()
+
+    def _valida(self, creds, margem):
+        if not creds.token:
+            return False
+        restante = self._segundos_ate_expirar(creds)
+        return restante is None or restante > margem
@@ -0,0 +1,257 @@
+"""
+Exportação dos eventos sem interface gráfica (servidores, cron, dashboards).
+Usa as mesmas fontes do widget (fontes.FonteGoogle + formatar_evento) como um
+pipeline de geradores: cada página é convertida e escrita assim que chega, então
+a memória usada não depende da quantidade de eventos.
+
+Uso:
+    python exportar.py [--formato jsonl|ics|csv] [--saida ARQUIVO]
+        [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD] [--calendario ID ...]
+        [--ics ARQUIVO ...] [--incremental] [--estado ARQUIVO]
+
+Com --incremental, o syncToken de cada calendário fica salvo no arquivo de
+estado e as execuções seguintes emitem apenas o que mudou (eventos cancelados
+saem com status 'cancelled'). Com --ics, os eventos de arquivos .ics locais
+entram na mesma exportação, mesclados com os da conta; esses não vêm em
+páginas: o índice do arquivo limita a leitura ao intervalo, mas as ocorrências
+do intervalo são expandidas e ordenadas em memória antes da mescla.
+"""
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from operator import itemgetter
+
+import api_calendario
+import fontes
+import instrumentacao
+from armazenamento import diretorio_config, gravar_atomico
+
+CAMPOS = ('calendarId', 'id', 'status', 'titulo', 'local', 'inicio', 'fim',
+          'dia_inteiro', 'atualizado', 'cor')
+
+
+def caminho_estado():
+    return os.path.join(diretorio_config(), 'exportar_estado.json')
+
+
+def ler_estado(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _momento(minutos, dia_inteiro):
+    """Minutos locais (escala de Evento.ordem) em texto ISO: data ou data e hora."""
+    dia, minuto = divmod(minutos, 1440)
+    if dia_inteiro:
+        return date.fromordinal(dia).isoformat()
+    return (datetime.fromordinal(dia) + timedelta(minutes=minuto)).isoformat(timespec='minutes')
+
+
+def registro(event):
+    """Evento da API -> dicionário plano exportado (o mesmo registro do widget)."""
+    if event.get('status') == 'cancelled':
+        # Exclusões da sincronização incremental vêm só com id e status
+        return {**dict.fromkeys(CAMPOS), 'calendarId': event.get('calendarId'),
+                'id': event.get('id'), 'status': 'cancelled'}
+    evento = api_calendario.formatar_evento(event)
+    return {
+        'calendarId': evento.calendario,
+        'id': evento.id,
+        'status': event.get('status', 'confirmed'),
+        'titulo': evento.titulo,
+        'local': evento.local,
+        'inicio': _momento(evento.inicio_min, evento.dia_inteiro),
+        'fim': _momento(evento.fim_ordem, evento.dia_inteiro),
+        'dia_inteiro': evento.dia_inteiro,
+        'atualizado': evento.atualizado,
+        'cor': evento.cor,
+        '_ordem': evento.ordem,
+    }
+
+
+def mudancas_do_calendario(service, calendar_id, inicio, fim, estado, novos_tokens):
+    """
+    Gerador com os registros incrementais de um calendário: usa o syncToken salvo
+    em `estado` se o intervalo for o mesmo; o novo token vai para `novos_tokens`
+    só depois da última página.
+    """
+    anterior = estado.get(calendar_id)
+    if anterior and (anterior.get('inicio'), anterior.get('fim')) == (inicio, fim):
+        params = {'syncToken': anterior['sync_token']}
+    else:
+        params = {'timeMin': inicio, 'timeMax': fim}
+
+    from googleapiclient.errors import HttpError
+    try:
+        for pagina in api_calendario.paginas_eventos(service, calendar_id, singleEvents=True, **params):
+            for event in pagina.get('items', []):
+                event['calendarId'] = calendar_id
+                yield registro(event)
+    except HttpError as e:
+        if e.resp.status != 410 or 'syncToken' not in params:
+            raise
+        # Token expirado: exportar tudo de novo a partir do intervalo pedido
+        instrumentacao.aviso(f"syncToken expirado (410) em {calendar_id}, exportando tudo de novo",
+                             calendario=calendar_id)
+        del estado[calendar_id]
+        yield from mudancas_do_calendario(service, calendar_id, inicio, fim, estado, novos_tokens)
+        return
+    novos_tokens[calendar_id] = {'sync_token': pagina.get('nextSyncToken'),
+                                 'inicio': inicio, 'fim': fim}
+
+
+def eventos_das_fontes(lista_fontes, inicio, fim):
+    """Registros de todas as fontes mesclados em ordem de início (uma página por calendário em memória)."""
+    fluxos = [map(registro, eventos)
+              for fonte in lista_fontes
+              for eventos in fonte.eventos(inicio, fim).values()]
+    return heapq.merge(*fluxos, key=itemgetter('_ordem'))
+
+
+def escrever_jsonl(registros, saida):
+    total = 0
+    for r in registros:
+        r.pop('_ordem', None)
+        saida.write(json.dumps(r, ensure_ascii=False) + '\n')
+        total += 1
+    return total
+
+
+def escrever_csv(registros, saida):
+    escritor = csv.DictWriter(saida, fieldnames=CAMPOS, extrasaction='ignore')
+    escritor.writeheader()
+    total = 0
+    for r in registros:
+        escritor.writerow(r)
+        total += 1
+    return total
+
+
+def escrever_ics(registros, saida):
+    agora = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    _linhas_ics(saida, ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//PyGoogleCal//exportar//PT'])
+    total = 0
+    for r in registros:
+        linhas = ['BEGIN:VEVENT', f"UID:{r['id']}@{r['calendarId']}", f"DTSTAMP:{agora}"]
+        if r['status'] == 'cancelled':
+            linhas.append('STATUS:CANCELLED')
+        else:
+            for nome, valor in (('DTSTART', r['inicio']), ('DTEND', r['fim'])):
+                if r['dia_inteiro']:
+                    linhas.append(f"{nome};VALUE=DATE:{valor.replace('-', '')}")
+                else:
+                    # Horário local "flutuante", como exibido no widget
+                    linhas.append(f"{nome}:{valor.replace('-', '').replace(':', '')}00")
+            linhas.append(f"SUMMARY:{_escapar_ics(r['titulo'])}")
+            if r['local']:
+                linhas.append(f"LOCATION:{_escapar_ics(r['local'])}")
+        linhas.append('END:VEVENT')
+        _linhas_ics(saida, linhas)
+        total += 1
+    _linhas_ics(saida, ['END:VCALENDAR'])
+    return total
+
+
+def _escapar_ics(texto):
+    return (texto.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+
+def _linhas_ics(saida, linhas):
+    """Escreve as linhas com CRLF, dobrando as que passam de 75 octetos em UTF-8 (RFC 5545)."""
+    for linha in linhas:
+        codificada = linha.encode('utf-8')
+        while len(codificada) > 75:
+            # Maior prefixo que cabe em 75 octetos sem partir um caractere multibyte
+            corte = len(codificada[:75].decode('utf-8', 'ignore'))
+            saida.write(linha[:corte] + '\r\n')
+            linha = ' ' + linha[corte:]
+            codificada = linha.encode('utf-8')
+        saida.write(linha + '\r\n')
+
+
+ESCRITORES = {'jsonl': escrever_jsonl, 'csv': escrever_csv, 'ics': escrever_ics}
+
+
+def intervalo(inicio, fim):
+    """Datas AAAA-MM-DD -> (timeMin, timeMax) no formato usado pelo widget (mês atual por padrão)."""
+    padrao_inicio, padrao_fim = api_calendario.get_inicio_fim_mes()
+    time_min = (datetime.combine(date.fromisoformat(inicio), datetime.min.time()).isoformat() + 'Z'
+                if inicio else padrao_inicio)
+    time_max = (datetime.combine(date.fromisoformat(fim), datetime.max.time()).isoformat() + 'Z'
+                if fim else padrao_fim)
+    return time_min, time_max
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--formato', choices=sorted(ESCRITORES), default='jsonl')
+    parser.add_argument('--saida', help="arquivo de saída (padrão: stdout)")
+    parser.add_argument('--inicio', help="primeiro dia (AAAA-MM-DD; padrão: início do mês atual)")
+    parser.add_argument('--fim', help="último dia (AAAA-MM-DD; padrão: fim do mês atual)")
+    parser.add_argument('--calendario', action='append', dest='calendarios', metavar='ID',
+                        help="ID do calendário (repetível; padrão: os visíveis na conta)")
+    parser.add_argument('--ics', action='append', default=[], metavar='ARQUIVO',
+                        help="arquivo .ics local exportado junto (repetível)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="emite só as mudanças desde a última execução")
+    parser.add_argument('--estado', help="arquivo do estado incremental "
+                                         "(padrão: exportar_estado.json no diretório de configuração)")
+    args = parser.parse_args(argv)
+    if args.ics and args.incremental:
+        parser.error("--ics não pode ser usado com --incremental")
+
+    inicio, fim = intervalo(args.inicio, args.fim)
+    service = api_calendario.autenticar_google_calendar()
+    calendar_ids = args.calendarios or api_calendario.listar_calendarios(service)
+
+    caminho = args.estado or caminho_estado()
+    estado = ler_estado(caminho) if args.incremental else None
+    novos_tokens = {}
+
+    if estado is None:
+        # Busca paginada por calendário (sem batch, que traria tudo de uma vez);
+        # nos .ics, o índice do arquivo limita a leitura aos eventos do intervalo
+        lista_fontes = [fontes.FonteGoogle(service, calendar_ids, em_lote=False),
+                        *(fontes.FonteICS(arquivo) for arquivo in args.ics)]
+        registros = eventos_das_fontes(lista_fontes, inicio, fim)
+    else:
+        registros = (r for calendar_id in calendar_ids
+                     for r in mudancas_do_calendario(service, calendar_id, inicio, fim, estado, novos_tokens))
+
+    escrever = ESCRITORES[args.formato]
+    abrir = {'newline': ''} if args.formato in ('csv', 'ics') else {}
+    if args.saida:
+        # Grava num temporário e troca no fim: quem lê o arquivo nunca vê meia exportação
+        temporario = f"{args.saida}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8', **abrir) as saida:
+                total = escrever(registros, saida)
+            os.replace(temporario, args.saida)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+    else:
+        if abrir:
+            sys.stdout.reconfigure(newline='')
+        total = escrever(registros, sys.stdout)
+        sys.stdout.flush()
+
+    if estado is not None:
+        # Só depois de tudo escrito: uma falha no meio repete as mudanças na próxima vez
+        estado.update(novos_tokens)
+        gravar_atomico(caminho, json.dumps(estado, indent=2))
+    api_calendario.credenciais.parar()
+    print(f"{total} eventos exportados", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,545 @@
+"""
+Fontes de eventos. O widget, o serviço de sincronização e a exportação carregam
+eventos de uma lista de fontes, todas com a mesma interface (FonteEventos), e
+recebem eventos no formato da Calendar API (com 'calendarId'); daí em diante
+(formatar_evento, índices, lembretes, exportação) não importa de onde vieram.
+
+- FonteGoogle: os calendários da conta. O mês atual vem do armazenamento
+  sincronizado (syncToken); as demais janelas, de buscas batch ou paginadas.
+- FonteICS: um arquivo .ics local, lido um componente por vez. Um índice com o
+  período e a posição de cada VEVENT fica guardado por arquivo (junto com o
+  mtime), então abrir outro mês de um arquivo grande só lê os eventos desse
+  mês; as recorrências (RRULE) são expandidas só dentro do intervalo pedido.
+
+Os arquivos .ics exibidos no widget vêm da variável de ambiente PYGOOGLECAL_ICS
+(caminhos separados por os.pathsep).
+"""
+import bisect
+import hashlib
+import io
+import json
+import os
+import re
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+
+import api_calendario
+import instrumentacao
+from armazenamento import diretorio_config, gravar_atomico, instante
+from modelo import Evento
+
+# Formato do índice gravado em disco (mudar invalida os existentes)
+VERSAO_INDICE = 1
+
+# Último dia ordinal possível: recorrências sem UNTIL no índice
+SEM_FIM = date.max.toordinal()
+
+# Propriedades lidas na indexação (o resto do VEVENT só é lido quando o evento é usado)
+_INDEXADAS = (b'DTSTART', b'DTEND', b'DURATION', b'RRULE', b'RDATE', b'UID', b'RECURRENCE-ID')
+
+_DURACAO = re.compile(r'([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+_ESCAPE = re.compile(r'\\([\\;,nN])')
+
+_locais = None
+
+
+class FonteEventos:
+    """
+    Interface das fontes:
+    - calendarios(): calendarIds dos eventos que a fonte entrega;
+    - sincronizar(): atualiza a cópia local, se houver (True se algo mudou);
+    - versao(): valor que muda quando os eventos podem ter mudado;
+    - eventos(inicio, fim): {calendarId: eventos (formato da API) que se
+      sobrepõem a [timeMin, timeMax], em ordem de início}. Os valores podem ser
+      geradores, para mesclar os calendários sem carregar tudo.
+    Com `opcional`, um erro da fonte vira um aviso e a carga segue com as demais.
+    """
+
+    opcional = False
+
+    def calendarios(self):
+        raise NotImplementedError
+
+    def sincronizar(self):
+        return False
+
+    def versao(self):
+        return None
+
+    def eventos(self, inicio, fim):
+        raise NotImplementedError
+
+
+class FonteGoogle(FonteEventos):
+    """
+    Calendários da conta. Com `armazenamento`, sincronizar() faz a sincronização
+    incremental do mês atual e os intervalos que ele cobre são lidos do SQLite.
+    Fora dele, `em_lote` busca todos os calendários juntos em requisições batch
+    (janelas do widget); sem ele, cada calendário é um gerador paginado, com só
+    uma página em memória (exportação).
+    """
+
+    def __init__(self, service, calendar_ids, armazenamento=None, em_lote=True, tamanho_pagina=250):
+        self.service = service
+        self.calendar_ids = list(calendar_ids)
+        self.armazenamento = armazenamento
+        self.em_lote = em_lote
+        self.tamanho_pagina = tamanho_pagina
+
+    def calendarios(self):
+        return self.calendar_ids
+
+    def sincronizar(self):
+        if self.armazenamento is None:
+            return False
+        return api_calendario.sincronizar_armazenamento(
+            self.service, self.armazenamento, self.calendar_ids, self.tamanho_pagina)
+
+    def versao(self):
+        return self.armazenamento.versao if self.armazenamento is not None else None
+
+    def eventos(self, inicio, fim):
+        if self._sincronizado(inicio, fim):
+            por_calendario = {calendar_id: [] for calendar_id in self.calendar_ids}
+            # O armazenamento devolve os calendários mesclados em ordem de início
+            for evento in self.armazenamento.eventos_no_intervalo(self.calendar_ids, inicio, fim):
+                por_calendario[evento['calendarId']].append(evento)
+            return por_calendario
+        if self.em_lote:
+            return api_calendario.buscar_janela(self.service, self.calendar_ids, inicio, fim,
+                                                self.tamanho_pagina)
+        return {calendar_id: api_calendario.buscar_eventos(self.service, calendar_id, self.tamanho_pagina,
+                                                           inicio, fim)
+                for calendar_id in self.calendar_ids}
+
+    def _sincronizado(self, inicio, fim):
+        """Indica se o intervalo está dentro do sincronizado no armazenamento, em todos os calendários."""
+        if self.armazenamento is None:
+            return False
+        for calendar_id in self.calendar_ids:
+            estado = self.armazenamento.estado_sync(calendar_id)
+            if not estado or not estado[1] or not estado[2]:
+                return False
+            if instante(estado[1]) > instante(inicio) or instante(estado[2]) < instante(fim):
+                return False
+        return True
+
+
+class FonteICS(FonteEventos):
+    """Um arquivo .ics; os eventos saem com o calendarId `id` (padrão: "ics:<caminho>")."""
+
+    def __init__(self, caminho, id=None, opcional=False):
+        self.caminho = os.path.abspath(caminho)
+        self.id = id or f"ics:{self.caminho}"
+        self.opcional = opcional
+        self._indice = None  # (versão do arquivo, entradas, inícios, instâncias alteradas)
+
+    def calendarios(self):
+        return [self.id]
+
+    def versao(self):
+        """(mtime, tamanho) do arquivo: muda quando o conteúdo pode ter mudado."""
+        estado = os.stat(self.caminho)
+        return estado.st_mtime_ns, estado.st_size
+
+    def eventos(self, inicio, fim):
+        return {self.id: self.listar(inicio, fim)}
+
+    def listar(self, inicio=None, fim=None):
+        """Eventos (formato da API) que se sobrepõem a [inicio, fim], em ordem de início; padrão: o mês atual."""
+        if inicio is None or fim is None:
+            inicio, fim = api_calendario.get_inicio_fim_mes()
+        primeiro = date.fromisoformat(inicio[:10])
+        ultimo = date.fromisoformat(fim[:10])
+        entradas, inicios, alteradas = self._carregar_indice()
+
+        with instrumentacao.span('busca', calendario=self.id) as dados:
+            resultado = []
+            # Entradas em ordem de primeiro dia: só as que começam até o fim da janela
+            candidatas = islice(entradas, bisect.bisect_right(inicios, ultimo.toordinal()))
+            with open(self.caminho, 'rb') as f:
+                for _, dia_fim, offset, tamanho in candidatas:
+                    if dia_fim < primeiro.toordinal():
+                        continue
+                    try:
+                        resultado.extend(self._expandir(f, offset, tamanho, primeiro, ultimo, alteradas))
+                    except (ValueError, TypeError, KeyError, OverflowError) as e:
+                        instrumentacao.aviso(f"Evento inválido em {self.caminho} (byte {offset}): {e}",
+                                             calendario=self.id)
+            resultado.sort(key=lambda evento: Evento.da_api(evento, None).ordem)
+            dados['itens'] = len(resultado)
+        return resultado
+
+    def _carregar_indice(self):
+        """Índice do arquivo: da memória, do disco (mesmo mtime e tamanho) ou de uma nova leitura."""
+        versao = self.versao()
+        if self._indice is not None and self._indice[0] == versao:
+            return self._indice[1:]
+        caminho_cache = os.path.join(diretorio_indices(),
+                                     hashlib.sha1(self.caminho.encode('utf-8')).hexdigest() + '.json')
+        try:
+            with open(caminho_cache, encoding='utf-8') as f:
+                guardado = json.load(f)
+            if guardado['formato'] != VERSAO_INDICE or tuple(guardado['versao']) != versao:
+                raise ValueError("índice de outra versão do arquivo")
+            entradas, alteradas = guardado['entradas'], guardado['alteradas']
+        except (OSError, ValueError, KeyError):
+            with instrumentacao.span('indice_ics', calendario=self.id) as dados:
+                entradas, alteradas = indexar(self.caminho)
+                dados['eventos'] = len(entradas)
+            gravar_atomico(caminho_cache, json.dumps({
+                'formato': VERSAO_INDICE, 'versao': versao,
+                'entradas': entradas, 'alteradas': alteradas}))
+        self._indice = (versao, entradas, [e[0] for e in entradas], alteradas)
+        return self._indice[1:]
+
+    def _expandir(self, f, offset, tamanho, primeiro, ultimo, alteradas):
+        """Eventos (formato da API) do VEVENT em `offset` que ocupam algum dia de [primeiro, ultimo]."""
+        f.seek(offset)
+        bloco = f.read(tamanho)
+        props, alarmes = _ler_componente(bloco)
+        if _texto(props, 'STATUS').upper() == 'CANCELLED':
+            return []
+        inicio = _data_hora(*props['DTSTART'][0])
+        dia_inteiro = not isinstance(inicio, datetime)
+        if dia_inteiro:
+            inicio = datetime.combine(inicio, time())
+        if 'DTEND' in props:
+            duracao = _como_base(_data_hora(*props['DTEND'][0]), inicio) - inicio
+        elif 'DURATION' in props:
+            duracao = _duracao(props['DURATION'][0][1])
+        else:
+            duracao = timedelta(days=1) if dia_inteiro else timedelta(0)
+        if dia_inteiro:
+            duracao = max(duracao, timedelta(days=1))
+
+        # Limites da janela no mesmo tipo do DTSTART (com fuso ou flutuante)
+        janela_inicio = _como_base(datetime.combine(primeiro, time()), inicio, local=True)
+        janela_fim = _como_base(datetime.combine(ultimo + timedelta(days=1), time()), inicio, local=True)
+
+        uid = _texto(props, 'UID') or f"ics-{offset}"
+        recorrente = 'RRULE' in props or 'RDATE' in props
+        if recorrente:
+            ocorrencias = _ocorrencias(props, inicio, duracao, janela_inicio, janela_fim)
+            # Instâncias alteradas vêm em VEVENTs próprios (com RECURRENCE-ID)
+            excluidas = {_chave_instancia(_como_base(_data_hora({'TZID': tzid} if tzid else {}, valor), inicio),
+                                          dia_inteiro)
+                         for tzid, valor in alteradas.get(uid, ())}
+        else:
+            ocorrencias = [inicio]
+            excluidas = ()
+        if 'RECURRENCE-ID' in props:
+            instancia = _como_base(_data_hora(*props['RECURRENCE-ID'][0]), inicio)
+            uid = f"{uid}_{_chave_instancia(instancia, dia_inteiro)}"
+
+        base = {
+            'calendarId': self.id,
+            'status': 'confirmed',
+            'updated': _texto(props, 'LAST-MODIFIED') or _texto(props, 'DTSTAMP') or f"{zlib.crc32(bloco):08x}",
+            'summary': _texto(props, 'SUMMARY') or 'Evento sem título',
+            'reminders': {'useDefault': False, 'overrides': _lembretes(alarmes)},
+        }
+        local = _texto(props, 'LOCATION')
+        if local:
+            base['location'] = local
+        eventos = []
+        for ocorrencia in ocorrencias:
+            termino = ocorrencia + duracao
+            # Sobreposição com a janela; eventos sem duração contam no instante de início
+            if not (ocorrencia < janela_fim and (termino > janela_inicio or ocorrencia >= janela_inicio)):
+                continue
+            chave = _chave_instancia(ocorrencia, dia_inteiro)
+            if chave in excluidas:
+                continue
+            if dia_inteiro:
+                inicio_api = {'date': ocorrencia.date().isoformat()}
+                fim_api = {'date': termino.date().isoformat()}
+            else:
+                inicio_api = {'dateTime': ocorrencia.isoformat()}
+                fim_api = {'dateTime': termino.isoformat()}
+            eventos.append({**base, 'id': f"{uid}_{chave}" if recorrente else uid,
+                            'start': inicio_api, 'end': fim_api})
+        return eventos
+
+
+def diretorio_indices():
+    caminho = os.path.join(diretorio_config(), 'ics')
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+
+def fontes_locais():
+    """Fontes .ics configuradas em PYGOOGLECAL_ICS (criadas uma vez, para manter os índices)."""
+    global _locais
+    if _locais is None:
+        caminhos = os.environ.get('PYGOOGLECAL_ICS', '')
+        _locais = [FonteICS(caminho, opcional=True) for caminho in caminhos.split(os.pathsep) if caminho]
+    return _locais
+
+
+def calendarios(fontes):
+    """calendarIds de todas as fontes, na ordem da lista."""
+    return [calendar_id for fonte in fontes for calendar_id in fonte.calendarios()]
+
+
+def sincronizar(fontes):
+    """Sincroniza as fontes com cópia local; retorna True se alguma mudou."""
+    mudou = False
+    for fonte in fontes:
+        mudou = fonte.sincronizar() or mudou
+    return mudou
+
+
+def versao(fontes):
+    """Versões de todas as fontes (para saber se algo mudou sem reler os eventos)."""
+    versoes = []
+    for fonte in fontes:
+        try:
+            versoes.append(fonte.versao())
+        except (OSError, ValueError):
+            if not fonte.opcional:
+                raise
+            versoes.append(None)
+    return tuple(versoes)
+
+
+def eventos(fontes, inicio, fim):
+    """Eventos (formato da API) de todas as fontes no intervalo, numa lista sem ordem garantida."""
+    resultado = []
+    for fonte in fontes:
+        try:
+            for itens in fonte.eventos(inicio, fim).values():
+                resultado.extend(itens)
+        except (OSError, ValueError) as e:
+            if not fonte.opcional:
+                raise
+            instrumentacao.aviso(f"Erro ao ler a fonte {', '.join(fonte.calendarios())}: {e}",
+                                 calendarios=fonte.calendarios())
+    return resultado
+
+
+def indexar(caminho):
+    """
+    Percorre o arquivo uma vez e retorna (entradas, alteradas):
+    - entradas: [primeiro dia, último dia, offset, tamanho] de cada VEVENT, em
+      ordem de primeiro dia. Os dias (ordinais, com um dia de folga para o fuso)
+      cobrem toda a recorrência; sem UNTIL, o último é SEM_FIM.
+    - alteradas: {uid: [[tzid, RECURRENCE-ID], ...]}, as instâncias de
+      recorrências substituídas por um VEVENT próprio.
+    """
+    entradas = []
+    alteradas = {}
+    profundidade = 0  # Dentro de um VEVENT: 1; em um componente dele (VALARM): 2+
+    with open(caminho, 'rb') as f:
+        for inicio, fim, linha in _linhas_logicas(f):
+            if profundidade == 0:
+                if linha.rstrip().upper() == b'BEGIN:VEVENT':
+                    profundidade, offset, props = 1, inicio, {}
+                continue
+            if linha.startswith(b'BEGIN:'):
+                profundidade += 1
+            elif linha.startswith(b'END:'):
+                profundidade -= 1
+                if profundidade == 0:
+                    periodo = _periodo(props)
+                    if periodo is not None:
+                        entradas.append([*periodo, offset, fim - offset])
+                    if 'RECURRENCE-ID' in props and 'UID' in props:
+                        parametros, valor = props['RECURRENCE-ID']
+                        alteradas.setdefault(_desescapar(props['UID'][1]), []).append(
+                            [parametros.get('TZID'), valor])
+            elif profundidade == 1 and linha.startswith(_INDEXADAS):
+                nome, parametros, valor = _propriedade(linha)
+                props[nome] = (parametros, valor)
+    entradas.sort()
+    return entradas, alteradas
+
+
+def _linhas_logicas(arquivo, posicao=0):
+    """(offset inicial, offset final, linha) de cada linha lógica, já desdobrada (RFC 5545, 3.1)."""
+    pendente = None
+    for fisica in arquivo:
+        fim = posicao + len(fisica)
+        conteudo = fisica.rstrip(b'\r\n')
+        if pendente is not None and fisica[:1] in (b' ', b'\t'):
+            pendente[1] = fim
+            pendente[2] += conteudo[1:]
+        else:
+            if pendente is not None:
+                yield tuple(pendente)
+            pendente = [posicao, fim, conteudo]
+        posicao = fim
+    if pendente is not None:
+        yield tuple(pendente)
+
+
+def _propriedade(linha):
+    """b'DTSTART;TZID=X:valor' -> ('DTSTART', {'TZID': 'X'}, 'valor')."""
+    texto = linha.decode('utf-8', 'replace')
+    separador = texto.find(':')
+    if '"' in texto[:separador]:
+        # Parâmetro entre aspas pode conter ':'
+        aspas = False
+        for separador, caractere in enumerate(texto):
+            if caractere == '"':
+                aspas = not aspas
+            elif caractere == ':' and not aspas:
+                break
+    if separador < 0:
+        return texto.upper(), {}, ''
+    nome, *parametros = texto[:separador].split(';')
+    return (nome.upper(),
+            {chave.upper(): valor.strip('"') for chave, _, valor in (p.partition('=') for p in parametros)},
+            texto[separador + 1:])
+
+
+def _ler_componente(bloco):
+    """Propriedades de um VEVENT ({nome: [(parâmetros, valor), ...]}) e as de cada VALARM dele."""
+    props = {}
+    alarmes = []
+    atual = props
+    profundidade = 0
+    for _, _, linha in _linhas_logicas(io.BytesIO(bloco)):
+        if linha.startswith(b'BEGIN:'):
+            profundidade += 1
+            if profundidade == 2:
+                atual = {}
+                if linha[6:].rstrip().upper() == b'VALARM':
+                    alarmes.append(atual)
+        elif linha.startswith(b'END:'):
+            profundidade -= 1
+            atual = props
+        elif profundidade in (1, 2):
+            nome, parametros, valor = _propriedade(linha)
+            atual.setdefault(nome, []).append((parametros, valor))
+    return props, alarmes
+
+
+def _texto(props, nome):
+    valores = props.get(nome)
+    return _desescapar(valores[0][1]) if valores else ''
+
+
+def _desescapar(valor):
+    return _ESCAPE.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), valor)
+
+
+def _dia(valor):
+    return date(int(valor[:4]), int(valor[4:6]), int(valor[6:8])).toordinal()
+
+
+def _periodo(props):
+    """(primeiro dia, último dia) que o evento ou a recorrência pode ocupar, ou None se inválido."""
+    if 'DTSTART' not in props:
+        return None
+    try:
+        inicio = _dia(props['DTSTART'][1])
+        if 'DTEND' in props:
+            dias = _dia(props['DTEND'][1]) - inicio
+        elif 'DURATION' in props:
+            dias = _duracao(props['DURATION'][1]).days + 1
+        else:
+            dias = 1
+    except ValueError:
+        return None
+    fim = inicio + max(dias, 1)
+    if 'RDATE' in props:
+        fim = SEM_FIM
+    elif 'RRULE' in props:
+        ate = re.search(r'UNTIL=(\d{8})', props['RRULE'][1])
+        fim = _dia(ate.group(1)) + max(dias, 1) if ate else SEM_FIM
+    return inicio - 1, min(fim + 1, SEM_FIM)
+
+
+def _duracao(valor):
+    """Duração ISO 8601 do iCalendar (ex.: -PT15M, P1D) -> timedelta."""
+    partes = _DURACAO.match(valor.strip())
+    if partes is None:
+        raise ValueError(f"duração inválida: {valor!r}")
+    sinal, semanas, dias, horas, minutos, segundos = partes.groups()
+    duracao = timedelta(weeks=int(semanas or 0), days=int(dias or 0), hours=int(horas or 0),
+                        minutes=int(minutos or 0), seconds=int(segundos or 0))
+    return -duracao if sinal == '-' else duracao
+
+
+def _data_hora(parametros, valor):
+    """Valor DATE ou DATE-TIME -> date (dia inteiro) ou datetime (com fuso, UTC ou flutuante)."""
+    valor = valor.strip()
+    if parametros.get('VALUE') == 'DATE' or len(valor) == 8:
+        return date(int(valor[:4]), int(valor[4:6]), int(valor[6:8]))
+    momento = datetime.strptime(valor[:15], '%Y%m%dT%H%M%S')
+    if valor.endswith('Z'):
+        return momento.replace(tzinfo=timezone.utc)
+    if 'TZID' in parametros:
+        from dateutil import tz
+        fuso = tz.gettz(parametros['TZID'])
+        if fuso is not None:
+            return momento.replace(tzinfo=fuso)
+    # Sem fuso reconhecido: horário "flutuante", exibido como horário local
+    return momento
+
+
+def _como_base(valor, base, local=False):
+    """Converte `valor` (date/datetime) para o mesmo tipo de `base`: com fuso ou flutuante."""
+    if not isinstance(valor, datetime):
+        valor = datetime.combine(valor, time())
+    if base.tzinfo is not None and valor.tzinfo is None:
+        return valor.astimezone() if local else valor.replace(tzinfo=base.tzinfo)
+    if base.tzinfo is None and valor.tzinfo is not None:
+        return valor.astimezone().replace(tzinfo=None)
+    return valor
+
+
+def _chave_instancia(momento, dia_inteiro):
+    """Identificador de uma ocorrência, no formato usado pela Google nos ids de instâncias."""
+    if dia_inteiro:
+        return momento.strftime('%Y%m%d')
+    if momento.tzinfo is not None:
+        return momento.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return momento.strftime('%Y%m%dT%H%M%S')
+
+
+def _ocorrencias(props, inicio, duracao, janela_inicio, janela_fim):
+    """Inícios das ocorrências que podem se sobrepor à janela (a regra é percorrida só até ela)."""
+    from dateutil.rrule import rruleset, rrulestr
+
+    regras = rruleset()
+    for _, valor in props.get('RRULE', ()):
+        # O dateutil exige UNTIL e DTSTART do mesmo tipo; os arquivos misturam (UNTIL em UTC, em data...)
+        ate = re.search(r'UNTIL=([0-9TZ]+)', valor, re.IGNORECASE)
+        valor = re.sub(r';?UNTIL=[0-9TZ]+', '', valor, flags=re.IGNORECASE).strip(';')
+        regra = rrulestr(valor, dtstart=inicio)
+        if ate:
+            limite = _data_hora({}, ate.group(1))
+            if not isinstance(limite, datetime):
+                # UNTIL em data inclui o dia inteiro
+                limite = datetime.combine(limite, time.max)
+            regra = regra.replace(until=_como_base(limite, inicio))
+        regras.rrule(regra)
+    for nome, incluir in (('RDATE', regras.rdate), ('EXDATE', regras.exdate)):
+        for parametros, valores in props.get(nome, ()):
+            for valor in valores.split(','):
+                incluir(_como_base(_data_hora(parametros, valor), inicio))
+    if 'RRULE' not in props:
+        # Com RDATE, o próprio DTSTART é a primeira ocorrência
+        regras.rdate(inicio)
+    return regras.between(janela_inicio - duracao, janela_fim, inc=True)
+
+
+def _lembretes(alarmes):
+    """Antecedências (min) dos VALARM de exibição/som relativos ao início, como lembretes popup."""
+    lembretes = []
+    for alarme in alarmes:
+        if _texto(alarme, 'ACTION').upper() not in ('DISPLAY', 'AUDIO') or 'TRIGGER' not in alarme:
+            continue
+        parametros, valor = alarme['TRIGGER'][0]
+        if parametros.get('VALUE') == 'DATE-TIME' or parametros.get('RELATED') == 'END':
+            continue
+        try:
+            antecedencia = -_duracao(valor)
+        except ValueError:
+            continue
+        if antecedencia >= timedelta(0):
+            lembretes.append({'method': 'popup', 'minutes': int(antecedencia.total_seconds() // 60)})
+    return lembretes
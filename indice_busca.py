@@ -0,0 +1,98 @@
+"""
+Índice invertido para a busca de eventos.
+Cada palavra dos textos de um evento (título, local) é normalizada (minúsculas,
+sem acentos) e indexada por todos os seus prefixos, então a busca enquanto se
+digita é só uma consulta em dicionário por termo e uma interseção de conjuntos.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+_PALAVRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos ('Reunião' -> 'reuniao')."""
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def palavras(texto):
+    return _PALAVRA.findall(normalizar(texto))
+
+
+@lru_cache(maxsize=8192)
+def _prefixos(texto):
+    """Prefixos de todas as palavras do texto (títulos se repetem muito entre eventos)."""
+    return frozenset(palavra[:i] for palavra in palavras(texto)
+                     for i in range(1, len(palavra) + 1))
+
+
+class IndiceBusca:
+    """
+    Índice de itens com `textos(item) -> [str]`, identificados por `chave(item)`.
+    Como o IndiceIntervalos, `sincronizar(itens)` aplica só as diferenças,
+    usando `versao(item)` para detectar mudanças.
+    """
+
+    def __init__(self, textos, chave, versao=None):
+        self._textos = textos
+        self._chave = chave
+        self._versao = versao or (lambda item: None)
+        self._postings = {}  # prefixo -> {chave}
+        self._itens = {}     # chave -> (prefixos do item, versao)
+
+    def __len__(self):
+        return len(self._itens)
+
+    def adicionar(self, item):
+        chave = self._chave(item)
+        self.remover(chave)
+        prefixos = set()
+        for texto in self._textos(item):
+            if texto:
+                prefixos |= _prefixos(texto)
+        for prefixo in prefixos:
+            self._postings.setdefault(prefixo, set()).add(chave)
+        self._itens[chave] = (prefixos, self._versao(item))
+
+    def remover(self, chave):
+        registro = self._itens.pop(chave, None)
+        if registro is None:
+            return
+        for prefixo in registro[0]:
+            chaves = self._postings[prefixo]
+            chaves.discard(chave)
+            if not chaves:
+                del self._postings[prefixo]
+
+    def sincronizar(self, itens):
+        """Deixa o índice com exatamente `itens`. Retorna quantos foram alterados."""
+        novos = {self._chave(item): item for item in itens}
+        alterados = 0
+        for chave in [c for c in self._itens if c not in novos]:
+            self.remover(chave)
+            alterados += 1
+        for chave, item in novos.items():
+            registro = self._itens.get(chave)
+            if registro is None or registro[1] != self._versao(item):
+                self.adicionar(item)
+                alterados += 1
+        return alterados
+
+    def buscar(self, consulta):
+        """
+        Chaves dos itens em que cada palavra da consulta é prefixo de alguma
+        palavra indexada, ou None se a consulta não tem palavras (sem filtro).
+        """
+        termos = palavras(consulta)
+        if not termos:
+            return None
+        conjuntos = []
+        for termo in set(termos):
+            chaves = self._postings.get(termo)
+            if not chaves:
+                return set()
+            conjuntos.append(chaves)
+        conjuntos.sort(key=len)
+        return conjuntos[0].intersection(*conjuntos[1:])
@@ -0,0 +1,113 @@
+"""
+Índice de intervalos dos eventos, para responder "o que ocupa o dia D" e
+"o que está acontecendo agora" sem percorrer a lista inteira.
+
+Os intervalos [inicio, fim) são guardados em listas ordenadas pelo início,
+separadas por classe de duração (potências de 2). Numa classe em que nenhum
+intervalo dura mais que `2**classe`, só os que começam em [a - 2**classe, b)
+podem sobrepor [a, b): uma busca binária por classe delimita os candidatos.
+Inserir ou remover um intervalo mexe em uma única lista. Os instantes são
+inteiros (minutos locais, a mesma escala de `Evento.ordem`).
+"""
+from bisect import bisect_left, insort
+
+
+def _classe(duracao):
+    return max(duracao - 1, 0).bit_length()
+
+
+class IndiceIntervalos:
+    """
+    Índice de itens com `intervalo(item) -> (inicio, fim)` (fim exclusivo),
+    identificados por `chave(item)`. `sincronizar(itens)` aplica só as diferenças
+    em relação ao conteúdo atual, usando `versao(item)` para detectar mudanças.
+    """
+
+    def __init__(self, intervalo, chave, versao=None):
+        self._intervalo = intervalo
+        self._chave = chave
+        self._versao = versao or (lambda item: None)
+        self._classes = {}  # classe -> [(inicio, chave, fim, item)] ordenada
+        self._itens = {}    # chave -> (entrada, classe, versao)
+
+    def __len__(self):
+        return len(self._itens)
+
+    def adicionar(self, item):
+        chave = self._chave(item)
+        if chave in self._itens:
+            self.remover(chave)
+        entrada, classe = self._entrada(item, chave)
+        insort(self._classes.setdefault(classe, []), entrada)
+        self._itens[chave] = (entrada, classe, self._versao(item))
+
+    def _entrada(self, item, chave):
+        inicio, fim = self._intervalo(item)
+        return (inicio, chave, fim, item), _classe(fim - inicio)
+
+    def remover(self, chave):
+        registro = self._itens.pop(chave, None)
+        if registro is None:
+            return
+        entrada, classe, _ = registro
+        lista = self._classes[classe]
+        i = bisect_left(lista, entrada[:2])
+        del lista[i]
+        if not lista:
+            del self._classes[classe]
+
+    def sincronizar(self, itens):
+        """Deixa o índice com exatamente `itens`. Retorna quantos foram alterados."""
+        novos = {self._chave(item): item for item in itens}
+        alterados = 0
+        for chave in [c for c in self._itens if c not in novos]:
+            self.remover(chave)
+            alterados += 1
+        adicionar = []
+        for chave, item in novos.items():
+            registro = self._itens.get(chave)
+            if registro is None or registro[2] != self._versao(item):
+                self.remover(chave)
+                adicionar.append((chave, item))
+        alterados += len(adicionar)
+        if len(adicionar) < 64:
+            for _, item in adicionar:
+                self.adicionar(item)
+            return alterados
+        # Carga grande (ex.: primeira exibição): anexar e ordenar cada classe uma vez
+        tocadas = set()
+        for chave, item in adicionar:
+            entrada, classe = self._entrada(item, chave)
+            self._classes.setdefault(classe, []).append(entrada)
+            self._itens[chave] = (entrada, classe, self._versao(item))
+            tocadas.add(classe)
+        for classe in tocadas:
+            self._classes[classe].sort()
+        return alterados
+
+    def sobrepostos(self, inicio, fim):
+        """Itens cujo intervalo sobrepõe [inicio, fim), ordenados pelo início."""
+        resultado = []
+        for classe, lista in self._classes.items():
+            de = bisect_left(lista, (inicio - (1 << classe),))
+            ate = bisect_left(lista, (fim,))
+            resultado.extend(e for e in lista[de:ate] if e[2] > inicio)
+        if len(self._classes) > 1:
+            resultado.sort()
+        return [e[3] for e in resultado]
+
+    def no_ponto(self, ponto):
+        """Itens em andamento no instante `ponto`."""
+        return self.sobrepostos(ponto, ponto + 1)
+
+    def proximo_limite(self, ponto):
+        """
+        O próximo instante depois de `ponto` em que o conjunto de itens em
+        andamento muda (um início ou um fim), ou None se não houver.
+        """
+        candidatos = [self._intervalo(item)[1] for item in self.no_ponto(ponto)]
+        for lista in self._classes.values():
+            i = bisect_left(lista, (ponto + 1,))
+            if i < len(lista):
+                candidatos.append(lista[i][0])
+        return min(candidatos, default=None)
@@ -0,0 +1,97 @@
+"""
+Instrumentação leve do widget: mede fases (autenticação, build, busca por
+página, conversão, agrupamento, renderização) e registra avisos.
+
+Cada fase guarda as últimas durações em memória (para a última latência e o
+p95 exibidos no painel de diagnóstico). Se a variável de ambiente
+PYGOOGLECAL_LOG apontar para um arquivo, cada medição e cada aviso também é
+gravado nele como uma linha JSON.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Quantas medições recentes de cada fase entram nos percentis
+AMOSTRAS = 200
+
+# Ordem em que as fases aparecem no painel
+FASES = ('autenticacao', 'build', 'busca', 'conversao', 'agrupamento', 'render')
+
+_lock = threading.Lock()
+_amostras = {}  # fase -> deque de durações (ms)
+_ultimas = {}   # fase -> (duração em ms, atributos) da última medição
+_log = None
+
+
+def configurar_log(caminho):
+    """Passa a gravar as medições em `caminho` (JSON lines); None desativa."""
+    global _log
+    with _lock:
+        if _log is not None:
+            _log.close()
+        _log = open(caminho, 'a', encoding='utf-8', buffering=1) if caminho else None
+
+
+@contextmanager
+def span(fase, **atributos):
+    """
+    Mede a duração do bloco e a registra na fase. Os atributos (ex.: pagina,
+    eventos) vão para o log; o bloco pode completá-los durante a execução:
+
+        with span('busca', calendarios=3) as dados:
+            ...
+            dados['itens'] = total
+    """
+    inicio = time.perf_counter()
+    try:
+        yield atributos
+    finally:
+        registrar(fase, (time.perf_counter() - inicio) * 1000, **atributos)
+
+
+def registrar(fase, ms, **atributos):
+    """Registra uma duração já medida (em ms)."""
+    with _lock:
+        amostras = _amostras.get(fase)
+        if amostras is None:
+            amostras = _amostras[fase] = deque(maxlen=AMOSTRAS)
+        amostras.append(ms)
+        _ultimas[fase] = (ms, atributos)
+        if _log is not None:
+            _escrever({'fase': fase, 'ms': round(ms, 3), **atributos})
+
+
+def aviso(mensagem, **dados):
+    """Mensagem de diagnóstico (erros recuperáveis): stderr e, se ativo, o log."""
+    print(mensagem, file=sys.stderr)
+    if _log is not None:
+        with _lock:
+            _escrever({'aviso': mensagem, **dados})
+
+
+def estatisticas():
+    """[(fase, última ms, p95 ms, amostras)] das fases já medidas, na ordem de FASES."""
+    with _lock:
+        copias = {fase: (list(amostras), _ultimas[fase][0]) for fase, amostras in _amostras.items()}
+    ordem = [f for f in FASES if f in copias] + sorted(f for f in copias if f not in FASES)
+    resultado = []
+    for fase in ordem:
+        amostras, ultima = copias[fase]
+        amostras.sort()
+        p95 = amostras[min(len(amostras) - 1, int(len(amostras) * 0.95))]
+        resultado.append((fase, ultima, p95, len(amostras)))
+    return resultado
+
+
+def _escrever(registro):
+    registro = {'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'thread': threading.current_thread().name, **registro}
+    _log.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+
+
+configurar_log(os.environ.get('PYGOOGLECAL_LOG'))
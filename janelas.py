@@ -0,0 +1,130 @@
+"""
+Janelas de tempo navegáveis (mês, semana ou próximos N dias) e o cache LRU dos
+eventos já buscados para cada janela.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+MESES = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho',
+         'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+# Tipos de janela, na ordem em que o título alterna entre eles
+TIPOS = ('mes', 'semana', 'dias')
+
+
+class JanelaTempo:
+    """Intervalo de datas [inicio, fim] de um dos TIPOS; imutável e usável como chave."""
+
+    __slots__ = ('tipo', 'inicio', 'fim', 'dias')
+
+    def __init__(self, tipo, inicio, dias=14):
+        self.tipo = tipo
+        self.dias = dias
+        if tipo == 'mes':
+            self.inicio = inicio.replace(day=1)
+            proximo = (self.inicio + timedelta(days=32)).replace(day=1)
+            self.fim = proximo - timedelta(days=1)
+        elif tipo == 'semana':
+            self.inicio = inicio - timedelta(days=inicio.weekday())
+            self.fim = self.inicio + timedelta(days=6)
+        else:
+            self.inicio = inicio
+            self.fim = inicio + timedelta(days=dias - 1)
+
+    @classmethod
+    def atual(cls, tipo='mes', dias=14):
+        return cls(tipo, date.today(), dias)
+
+    def anterior(self):
+        if self.tipo == 'mes':
+            return JanelaTempo('mes', self.inicio - timedelta(days=1), self.dias)
+        return JanelaTempo(self.tipo, self.inicio - timedelta(days=(self.fim - self.inicio).days + 1),
+                           self.dias)
+
+    def proxima(self):
+        return JanelaTempo(self.tipo, self.fim + timedelta(days=1), self.dias)
+
+    def com_tipo(self, tipo):
+        """A janela do novo tipo que contém o início desta (ou hoje, se esta contém hoje)."""
+        referencia = date.today() if self.contem(date.today()) else self.inicio
+        return JanelaTempo(tipo, referencia, self.dias)
+
+    def contem(self, dia):
+        return self.inicio <= dia <= self.fim
+
+    def dentro_de(self, outra):
+        return outra.inicio <= self.inicio and self.fim <= outra.fim
+
+    def intervalo(self):
+        """(timeMin, timeMax) em formato ISO, como esperado pela API."""
+        inicio = datetime.combine(self.inicio, datetime.min.time()).isoformat() + 'Z'
+        fim = datetime.combine(self.fim, datetime.max.time()).isoformat() + 'Z'
+        return inicio, fim
+
+    def titulo(self):
+        if self.tipo == 'mes':
+            return f"{MESES[self.inicio.month - 1]} {self.inicio.year}"
+        if self.tipo == 'dias' and self.inicio == date.today():
+            return f"Próximos {self.dias} dias"
+        return f"{self.inicio.strftime('%d/%m')} - {self.fim.strftime('%d/%m')}"
+
+    def _chave(self):
+        return self.tipo, self.inicio, self.fim
+
+    def __eq__(self, outra):
+        return isinstance(outra, JanelaTempo) and self._chave() == outra._chave()
+
+    def __hash__(self):
+        return hash(self._chave())
+
+    def __repr__(self):
+        return f"JanelaTempo({self.tipo!r}, {self.inicio}, {self.fim})"
+
+
+class CacheJanelas:
+    """
+    Cache LRU de eventos por (calendarId, timeMin, timeMax), limitado pela
+    memória estimada dos registros. Acessado pela interface e pela thread de
+    sincronização, por isso protegido por um lock.
+    """
+
+    def __init__(self, limite_bytes=16 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.total_bytes = 0
+        self._itens = OrderedDict()  # chave -> (eventos, tamanho)
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            self._itens.move_to_end(chave)
+            return item[0]
+
+    def contem(self, chave):
+        with self._lock:
+            return chave in self._itens
+
+    def guardar(self, chave, eventos):
+        tamanho = _tamanho_estimado(eventos)
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.total_bytes -= anterior[1]
+            self._itens[chave] = (eventos, tamanho)
+            self.total_bytes += tamanho
+            # Descartar os menos usados até caber no limite (mantendo o recém-guardado)
+            while self.total_bytes > self.limite_bytes and len(self._itens) > 1:
+                _, (_, removido) = self._itens.popitem(last=False)
+                self.total_bytes -= removido
+
+
+def _tamanho_estimado(eventos):
+    """Memória aproximada da lista de registros, incluindo as strings de cada um."""
+    total = sys.getsizeof(eventos)
+    for evento in eventos:
+        total += sys.getsizeof(evento) + sys.getsizeof(evento.titulo) + sys.getsizeof(evento.id)
+    return total
@@ -0,0 +1,113 @@
+"""
+Lembretes dos eventos: os popups configurados no Google Calendar e o aviso de
+"começando agora". Os horários de disparo ficam num heap e só um timer fica
+armado, o do próximo disparo; cada atualização dos eventos mexe apenas nos que
+foram incluídos, movidos ou cancelados, sem nenhuma consulta extra à API.
+"""
+import heapq
+from datetime import datetime
+from itertools import count
+
+# Espera máxima (ms) do timer: depois de uma suspensão ou de um ajuste do
+# relógio, o próximo disparo é recalculado em no máximo esse tempo
+ESPERA_MAXIMA = 60 * 60 * 1000
+
+# Lembretes atrasados mais que isso (s), ex.: computador suspenso, são descartados
+ATRASO_MAXIMO = 5 * 60
+
+
+def agora_em_segundos():
+    """O momento atual em segundos locais (dia ordinal * 86400 + segundos do dia)."""
+    agora = datetime.now()
+    return (agora.toordinal() * 86400 + agora.hour * 3600 + agora.minute * 60
+            + agora.second + agora.microsecond / 1e6)
+
+
+def disparos(evento):
+    """[(minuto local do disparo, antecedência em min)] do evento; antecedência 0 = início."""
+    inicio = evento.inicio_min
+    resultado = [(inicio - minutos, minutos) for minutos in evento.lembretes]
+    if not evento.dia_inteiro and 0 not in evento.lembretes:
+        resultado.append((inicio, 0))
+    return resultado
+
+
+class AgendaLembretes:
+    """
+    Heap de (instante, geração, chave, antecedência). Quando um evento muda, ele
+    recebe uma nova geração e as entradas antigas ficam no heap até serem
+    descartadas ao chegar ao topo. `agendar(ms, funcao)` e `cancelar(id)` são
+    os do Tk (root.after/after_cancel); `ao_disparar(evento, antecedencia)` é
+    chamado no horário de cada lembrete.
+    """
+
+    def __init__(self, agendar, cancelar, ao_disparar):
+        self._agendar = agendar
+        self._cancelar = cancelar
+        self._ao_disparar = ao_disparar
+        self._heap = []
+        self._atuais = {}  # chave -> (assinatura, geração, evento)
+        self._geracoes = count()
+        self._timer = None
+        self._alvo = None  # Instante para o qual o timer está armado
+
+    def sincronizar(self, eventos):
+        """Atualiza os lembretes para `eventos` (a lista completa atual) e rearma o timer se preciso."""
+        agora = agora_em_segundos()
+        vistos = set()
+        for evento in eventos:
+            chave = (evento.calendario or '', evento.id or '')
+            vistos.add(chave)
+            assinatura = (evento.inicio_min, evento.lembretes, evento.dia_inteiro)
+            atual = self._atuais.get(chave)
+            if atual is not None and atual[0] == assinatura:
+                # Mesmos horários: só guarda o registro novo (título pode ter mudado)
+                self._atuais[chave] = (assinatura, atual[1], evento)
+                continue
+            geracao = next(self._geracoes)
+            self._atuais[chave] = (assinatura, geracao, evento)
+            for minuto, antecedencia in disparos(evento):
+                if minuto * 60 > agora:
+                    heapq.heappush(self._heap, (minuto * 60, geracao, chave, antecedencia))
+        for chave in self._atuais.keys() - vistos:
+            del self._atuais[chave]
+        if len(self._heap) > 4 * len(self._atuais) + 64:
+            # Muitas entradas obsoletas: reconstruir só com as válidas
+            self._heap = [entrada for entrada in self._heap if self._valida(entrada)]
+            heapq.heapify(self._heap)
+        self._armar()
+
+    def parar(self):
+        if self._timer is not None:
+            self._cancelar(self._timer)
+        self._timer = self._alvo = None
+
+    def _valida(self, entrada):
+        atual = self._atuais.get(entrada[2])
+        return atual is not None and atual[1] == entrada[1]
+
+    def _armar(self):
+        while self._heap and not self._valida(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self.parar()
+            return
+        alvo = self._heap[0][0]
+        if self._timer is not None and self._alvo == alvo:
+            return  # O próximo disparo não mudou
+        self.parar()
+        espera = min(max((alvo - agora_em_segundos()) * 1000, 0), ESPERA_MAXIMA)
+        self._timer = self._agendar(int(espera), self._disparar)
+        self._alvo = alvo
+
+    def _disparar(self):
+        self._timer = self._alvo = None
+        agora = agora_em_segundos()
+        # O after() do Tk pode acordar alguns milissegundos antes
+        while self._heap and self._heap[0][0] <= agora + 0.5:
+            instante, geracao, chave, antecedencia = heapq.heappop(self._heap)
+            atual = self._atuais.get(chave)
+            if atual is None or atual[1] != geracao or agora - instante > ATRASO_MAXIMO:
+                continue
+            self._ao_disparar(atual[2], antecedencia)
+        self._armar()
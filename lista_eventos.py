@@ -0,0 +1,209 @@
+"""
+Renderizador virtualizado da lista de eventos.
+Desenha as linhas diretamente no tk.Canvas (create_text/create_rectangle) e só
+materializa as que estão visíveis, mais uma pequena margem (overscan). Os itens
+do canvas que saem da área visível voltam para um pool e são reaproveitados.
+
+Cada atualização é comparada com o modelo atual pela chave de cada linha: linhas
+inalteradas não são tocadas, linhas deslocadas são apenas movidas e somente as
+que mudaram de versão são reconfiguradas.
+"""
+from bisect import bisect_left, bisect_right
+
+# Altura fixa (em pixels) de cada tipo de linha
+ALTURAS = {
+    'separador': 13,
+    'data': 24,
+    'evento': 38,
+}
+
+FONTE_DATA = ("Arial", 10, "bold")
+FONTE_TITULO = ("Arial", 10)
+FONTE_TITULO_AGORA = ("Arial", 10, "bold")
+FONTE_HORARIO = ("Arial", 9)
+
+
+class ListaEventosCanvas:
+    """
+    Lista de linhas desenhada em um canvas. Cada linha é uma tupla
+    (chave, versao, tipo, dados), onde tipo/dados são:
+    'separador' / None, 'data' / texto ou 'evento' / (titulo, horario, cor, agora),
+    onde `agora` destaca eventos em andamento.
+    A chave identifica a linha entre atualizações; a versão indica se mudou.
+    """
+
+    def __init__(self, canvas, cores, largura=320, overscan=5):
+        self.canvas = canvas
+        self.cores = cores
+        self.largura = largura
+        self.overscan = overscan
+        self.linhas = []
+        self._topos = []       # coordenada y do topo de cada linha
+        self._indices = {}     # chave -> índice da linha no modelo atual
+        self.altura_total = 0
+        self._visiveis = {}    # chave -> [tipo, itens do canvas, y, versao]
+        self._pools = {tipo: [] for tipo in ALTURAS}
+        self._mensagem = None
+        self._cor_mensagem = None
+        canvas.bind('<Configure>', lambda e: self._renderizar())
+
+    def definir_linhas(self, linhas):
+        """
+        Aplica o novo conteúdo comparando-o com o atual. Se nada mudou, nenhum
+        item do canvas é tocado; caso contrário a posição de rolagem é mantida.
+        """
+        if self._mensagem is None and self._assinatura(linhas) == self._assinatura(self.linhas):
+            # Mesmas chaves e versões: só guarda os dados (usados por definir_cores)
+            self.linhas = linhas
+            return
+        self._limpar_mensagem()
+        ancora = self._ancora()
+
+        self.linhas = linhas
+        self._topos = []
+        self._indices = {}
+        y = 0
+        for indice, (chave, _, tipo, _) in enumerate(linhas):
+            self._topos.append(y)
+            self._indices[chave] = indice
+            y += ALTURAS[tipo]
+        self.altura_total = y
+
+        # Diff das linhas materializadas: remover, mover ou reconfigurar
+        for chave, visivel in list(self._visiveis.items()):
+            indice = self._indices.get(chave)
+            if indice is None:
+                self._liberar(chave)
+                continue
+            tipo, itens, y_antigo, versao = visivel
+            _, nova_versao, _, dados = linhas[indice]
+            novo_y = self._topos[indice]
+            if nova_versao != versao:
+                self._posicionar(tipo, itens, novo_y, dados)
+            elif novo_y != y_antigo:
+                for item in itens:
+                    self.canvas.move(item, 0, novo_y - y_antigo)
+            visivel[2] = novo_y
+            visivel[3] = nova_versao
+
+        self.canvas.configure(scrollregion=(0, 0, self.largura, self.altura_total))
+        self._restaurar_ancora(ancora)
+        self._renderizar()
+
+    def mensagem(self, texto, cor):
+        """
+        Mostra um texto único no lugar da lista (carregando, vazio, erro).
+        `cor` é a chave da paleta, para que a mensagem acompanhe o tema.
+        """
+        self.definir_linhas([])
+        self._limpar_mensagem()
+        self._cor_mensagem = cor
+        self._mensagem = self.canvas.create_text(
+            self.largura // 2, 10, text=texto, anchor='n', font=FONTE_TITULO,
+            fill=self.cores[cor], width=self.largura - 20)
+
+    def definir_cores(self, cores):
+        """Recolore no lugar os itens visíveis; os do pool são recoloridos ao reutilizar."""
+        self.cores = cores
+        if self._mensagem is not None:
+            self.canvas.itemconfigure(self._mensagem, fill=cores[self._cor_mensagem])
+        for chave, (tipo, itens, y, _) in self._visiveis.items():
+            self._posicionar(tipo, itens, y, self.linhas[self._indices[chave]][3])
+
+    def rolar(self, unidades):
+        self.canvas.yview_scroll(unidades, "units")
+        self._renderizar()
+
+    def ir_para_topo(self):
+        self.canvas.yview_moveto(0)
+        self._renderizar()
+
+    @staticmethod
+    def _assinatura(linhas):
+        return [(chave, versao) for chave, versao, _, _ in linhas]
+
+    def _limpar_mensagem(self):
+        if self._mensagem is not None:
+            self.canvas.delete(self._mensagem)
+            self._mensagem = None
+
+    def _ancora(self):
+        """Primeira linha visível e seu deslocamento, para preservar a rolagem."""
+        if not self.linhas:
+            return None
+        topo = self.canvas.canvasy(0)
+        indice = max(bisect_right(self._topos, topo) - 1, 0)
+        return self.linhas[indice][0], topo - self._topos[indice]
+
+    def _restaurar_ancora(self, ancora):
+        if ancora is None or not self.altura_total:
+            return
+        chave, deslocamento = ancora
+        indice = self._indices.get(chave)
+        if indice is not None:
+            self.canvas.yview_moveto((self._topos[indice] + deslocamento) / self.altura_total)
+
+    def _renderizar(self):
+        """Materializa as linhas dentro da janela visível e libera as demais."""
+        if not self.linhas:
+            return
+        topo = self.canvas.canvasy(0)
+        base = topo + max(self.canvas.winfo_height(), 1)
+        primeiro = max(bisect_right(self._topos, topo) - 1 - self.overscan, 0)
+        ultimo = min(bisect_left(self._topos, base) + self.overscan, len(self.linhas))
+
+        for chave in list(self._visiveis):
+            if not primeiro <= self._indices[chave] < ultimo:
+                self._liberar(chave)
+        for indice in range(primeiro, ultimo):
+            if self.linhas[indice][0] not in self._visiveis:
+                self._materializar(indice)
+
+    def _liberar(self, chave):
+        """Esconde os itens da linha e devolve-os ao pool do seu tipo."""
+        tipo, itens, _, _ = self._visiveis.pop(chave)
+        for item in itens:
+            self.canvas.itemconfigure(item, state='hidden')
+        self._pools[tipo].append(itens)
+
+    def _materializar(self, indice):
+        chave, versao, tipo, dados = self.linhas[indice]
+        y = self._topos[indice]
+        pool = self._pools[tipo]
+        itens = pool.pop() if pool else self._criar_itens(tipo)
+        self._posicionar(tipo, itens, y, dados)
+        for item in itens:
+            self.canvas.itemconfigure(item, state='normal')
+        self._visiveis[chave] = [tipo, itens, y, versao]
+
+    def _criar_itens(self, tipo):
+        c = self.canvas
+        if tipo == 'separador':
+            return (c.create_rectangle(0, 0, 0, 0, outline=''),)
+        if tipo == 'data':
+            return (c.create_text(0, 0, anchor='nw', font=FONTE_DATA),)
+        # Evento: indicador de cor, título e horário
+        return (c.create_rectangle(0, 0, 0, 0, outline=''),
+                c.create_text(0, 0, anchor='nw', font=FONTE_TITULO),
+                c.create_text(0, 0, anchor='nw', font=FONTE_HORARIO))
+
+    def _posicionar(self, tipo, itens, y, dados):
+        """Move e reconfigura os itens reaproveitados para a linha em y."""
+        c = self.canvas
+        if tipo == 'separador':
+            c.coords(itens[0], 0, y + 6, self.largura, y + 7)
+            c.itemconfigure(itens[0], fill=self.cores['cinza_claro'])
+        elif tipo == 'data':
+            c.coords(itens[0], 0, y + 6)
+            c.itemconfigure(itens[0], text=dados, fill=self.cores['cinza_data'])
+        else:
+            titulo, horario, cor, agora = dados
+            indicador, texto_titulo, texto_horario = itens
+            c.coords(indicador, 0, y + 2, 4, y + ALTURAS['evento'] - 2)
+            c.itemconfigure(indicador, fill=cor)
+            c.coords(texto_titulo, 10, y + 2)
+            c.itemconfigure(texto_titulo, text=titulo, fill=self.cores['cinza_texto'],
+                            font=FONTE_TITULO_AGORA if agora else FONTE_TITULO)
+            c.coords(texto_horario, 10, y + 20)
+            c.itemconfigure(texto_horario, text=horario,
+                            fill=cor if agora else self.cores['cinza_data'])
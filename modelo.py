@@ -0,0 +1,119 @@
+"""
+Registro compacto de evento usado pela interface.
+As chaves de ordenação e agrupamento (dia ordinal e minuto do dia, no horário
+local) são calculadas uma única vez na conversão; os textos exibidos (data,
+hora) são formatados só quando lidos.
+"""
+from datetime import date, datetime
+
+DIAS_SEMANA = ('Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')
+
+
+class Evento:
+    __slots__ = ('id', 'calendario', 'atualizado', 'titulo', 'cor',
+                 'dia_inteiro', 'dia', 'minuto', 'fim_ordem', 'local', 'lembretes', 'ordem')
+
+    def __init__(self, id, calendario, atualizado, titulo, cor, dia_inteiro, dia, minuto,
+                 fim_ordem=None, local=None, lembretes=()):
+        self.id = id
+        self.calendario = calendario
+        self.atualizado = atualizado  # Versão do evento (para o diff da lista)
+        self.titulo = titulo
+        self.cor = cor
+        self.dia_inteiro = dia_inteiro
+        self.dia = dia          # date.toordinal() do início, no horário local
+        self.minuto = minuto    # Minuto do dia (-1 para dia inteiro, None se desconhecido)
+        # Chave de ordenação: eventos de dia inteiro antes dos com horário
+        self.ordem = dia * 1440 + (minuto if minuto is not None else 0)
+        # Fim (exclusivo) na mesma escala de minutos locais; padrão: o próprio dia ou 1 minuto
+        if fim_ordem is None:
+            fim_ordem = self.inicio_min + (1440 if dia_inteiro else 1)
+        self.fim_ordem = fim_ordem
+        self.local = local
+        self.lembretes = tuple(lembretes)  # Antecedências (min) dos lembretes popup
+
+    @classmethod
+    def da_api(cls, event, cor, lembretes=()):
+        """Converte um evento da API (start com 'date' ou 'dateTime')."""
+        start = event['start']
+        end = event.get('end') or {}
+        if 'dateTime' in start:
+            inicio = _minutos_locais(start['dateTime'])
+            dia_inteiro = False
+            dia, minuto = divmod(inicio, 1440)
+            fim = _minutos_locais(end['dateTime']) if 'dateTime' in end else inicio
+            fim_ordem = max(fim, inicio + 1)
+        else:
+            dia_inteiro = True
+            dia = date.fromisoformat(start['date']).toordinal()
+            minuto = -1
+            # Em eventos de dia inteiro a data final é exclusiva
+            fim_dia = date.fromisoformat(end['date']).toordinal() if 'date' in end else dia + 1
+            fim_ordem = max(fim_dia, dia + 1) * 1440
+        return cls(event.get('id'), event.get('calendarId'), event.get('updated'),
+                   event.get('summary', 'Evento sem título'), cor, dia_inteiro, dia, minuto,
+                   fim_ordem, event.get('location'), lembretes)
+
+    @property
+    def inicio_min(self):
+        """Início em minutos locais (dia ordinal * 1440 + minuto do dia)."""
+        return self.dia * 1440 + max(self.minuto or 0, 0)
+
+    @property
+    def fim_dia(self):
+        """Último dia (ordinal) ocupado pelo evento."""
+        return (self.fim_ordem - 1) // 1440
+
+    @property
+    def hora_fim(self):
+        minuto = self.fim_ordem % 1440
+        return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+    @property
+    def data_obj(self):
+        inicio = datetime.fromordinal(self.dia)
+        if self.minuto and self.minuto > 0:
+            inicio = inicio.replace(hour=self.minuto // 60, minute=self.minuto % 60)
+        return inicio
+
+    @property
+    def data(self):
+        d = date.fromordinal(self.dia)
+        return f"{d.day:02d}/{d.month:02d}/{d.year}"
+
+    @property
+    def data_curta(self):
+        d = date.fromordinal(self.dia)
+        return f"{d.day:02d}/{d.month:02d}"
+
+    @property
+    def hora(self):
+        if self.minuto is None:
+            return '??:??'
+        if self.minuto < 0:
+            return ''
+        return f"{self.minuto // 60:02d}:{self.minuto % 60:02d}"
+
+    def para_dict(self):
+        """Forma serializável (snapshot)."""
+        return {nome: getattr(self, nome) for nome in self.__slots__ if nome != 'ordem'}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(**dados)
+
+
+def _minutos_locais(valor):
+    """Converte um dateTime da API em minutos locais (dia ordinal * 1440 + minuto)."""
+    instante = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    if instante.tzinfo is not None:
+        # Exibir sempre no horário local
+        instante = instante.astimezone()
+    return instante.toordinal() * 1440 + instante.hour * 60 + instante.minute
+
+
+def agora_em_minutos():
+    """O momento atual na escala de minutos locais usada por `ordem`/`fim_ordem`."""
+    agora = datetime.now()
+    return agora.toordinal() * 1440 + agora.hour * 60 + agora.minute
+
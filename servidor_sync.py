@@ -0,0 +1,450 @@
+"""
+Serviço local de sincronização, opcional, compartilhado por vários widgets.
+Um único processo autentica, segue o agendamento adaptativo e mantém o
+armazenamento; cada widget se conecta por um socket Unix, assina a janela que
+exibe e recebe só as diferenças (eventos alterados e removidos). Assim, N
+widgets custam uma consulta à API e uma cópia das bibliotecas do Google.
+
+Uso:
+    python servidor_sync.py [--socket CAMINHO]
+
+Com o serviço rodando, o widget o usa automaticamente; sem ele, sincroniza
+sozinho como antes.
+
+Protocolo (uma mensagem JSON por linha):
+    widget -> serviço  {"op": "assinar", "janela": [tipo, inicio, dias]}
+                       {"op": "atualizar", "oportunista": false}
+    serviço -> widget  {"tipo": "carregando"} | {"tipo": "sem_mudancas"}
+                       {"tipo": "erro", "mensagem": "..."}
+                       {"tipo": "eventos", "janela": [...], "completo": false,
+                        "alterados": [evento, ...], "removidos": [[calendario, id], ...]}
+"""
+import argparse
+import json
+import os
+import queue
+import selectors
+import signal
+import socket
+import sys
+import threading
+from datetime import date
+from operator import attrgetter
+
+import fontes
+import instrumentacao
+import sincronizacao
+from armazenamento import diretorio_config, salvar_snapshot
+from janelas import JanelaTempo
+from modelo import Evento
+
+# Espera (s) entre tentativas do widget de reconectar a um serviço que caiu
+RECONECTAR_A_CADA = 5
+
+
+def caminho_socket():
+    return os.path.join(diretorio_config(), 'sync.sock')
+
+
+def janela_para_json(janela):
+    return [janela.tipo, janela.inicio.isoformat(), janela.dias]
+
+
+def janela_de_json(dados):
+    tipo, inicio, dias = dados
+    return JanelaTempo(tipo, date.fromisoformat(inicio), dias)
+
+
+def _chave(evento):
+    return evento.calendario or '', evento.id or ''
+
+
+def _conectar(caminho):
+    """Socket conectado ao serviço em `caminho`, ou None se não houver um rodando."""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(caminho)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _linha(mensagem):
+    return (json.dumps(mensagem, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+# --- Serviço ---
+
+def preparar():
+    """Executado na thread de sincronização do serviço: autentica e monta as fontes, como o widget."""
+    from api_calendario import autenticar_google_calendar, listar_calendarios
+    from armazenamento import ArmazenamentoEventos
+
+    service = autenticar_google_calendar()
+    conta = fontes.FonteGoogle(service, listar_calendarios(service), ArmazenamentoEventos())
+    return {'fontes': [conta, *fontes.fontes_locais()]}
+
+
+def carregar_janelas(contexto, janelas):
+    """
+    Executado na thread de sincronização do serviço: atualiza todas as janelas
+    assinadas (o mês atual sincronizado uma vez) e retorna
+    {janela: (alterados, removidos)} em relação à carga anterior de cada uma,
+    ou None se nenhuma mudou.
+    """
+    from api_calendario import credenciais, formatar_evento
+
+    credenciais.garantir_valida()
+    mes_atual = JanelaTempo.atual('mes')
+    if any(janela.dentro_de(mes_atual) for janela in janelas):
+        fontes.sincronizar(contexto['fontes'])
+    versao_anterior = contexto.get('versao')
+    versao = fontes.versao(contexto['fontes'])
+
+    anteriores = contexto.get('conhecidos', {})
+    conhecidos = {}
+    deltas = {}
+    mudou = False
+    for janela in janelas:
+        antes = anteriores.get(janela)
+        if janela.dentro_de(mes_atual):
+            if antes is not None and versao == versao_anterior:
+                # Nenhuma fonte mudou desde a última carga: nada a converter
+                conhecidos[janela] = antes
+                deltas[janela] = ([], [])
+                continue
+        brutos = fontes.eventos(contexto['fontes'], *janela.intervalo())
+        with instrumentacao.span('conversao', eventos=len(brutos), janela=repr(janela)):
+            eventos = [formatar_evento(e) for e in brutos]
+        if janela == mes_atual:
+            # Mantém o snapshot da próxima abertura dos widgets, como na sincronização local
+            salvar_snapshot(sorted(eventos, key=attrgetter('ordem')), janela.intervalo())
+
+        atuais = {_chave(e): e.para_dict() for e in eventos}
+        antes = antes or {}
+        alterados = [dados for chave, dados in atuais.items() if antes.get(chave) != dados]
+        removidos = [chave for chave in antes if chave not in atuais]
+        conhecidos[janela] = atuais
+        deltas[janela] = (alterados, removidos)
+        mudou = mudou or bool(alterados or removidos) or janela not in anteriores
+    # Só depois de todas as janelas: se alguma falhar, a próxima carga compara com
+    # o que os widgets realmente receberam (e não pula as mudanças já no SQLite)
+    contexto['versao'] = versao
+    contexto['conhecidos'] = conhecidos
+    return deltas if mudou else None
+
+
+class _Conexao:
+    __slots__ = ('sock', 'entrada', 'saida', 'janela', 'enviada')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.entrada = b''
+        self.saida = b''
+        self.janela = None
+        self.enviada = False  # Já recebeu o conteúdo completo da janela assinada
+
+
+class ServidorSincronizacao:
+    """
+    Laço do serviço: aceita widgets no socket, repassa as assinaturas ao
+    TrabalhadorSincronizacao (cuja "janela" é o conjunto das janelas assinadas)
+    e distribui o resultado de cada carga. Todo o estado das conexões pertence
+    à thread que chama `executar()`; a de sincronização só fala pela fila.
+    """
+
+    def __init__(self, caminho=None, trabalhador=None):
+        self.caminho = caminho or caminho_socket()
+        self.trabalhador = trabalhador or sincronizacao.TrabalhadorSincronizacao(
+            preparar, carregar_janelas, frozenset())
+        self.conexoes = {}  # socket -> _Conexao
+        # Último conteúdo de cada janela carregada ({chave: evento}), para novos assinantes
+        self.conteudo = {}
+        self._seletor = selectors.DefaultSelector()
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+
+    def executar(self):
+        servidor = self._abrir_socket()
+        self._seletor.register(servidor, selectors.EVENT_READ)
+        self.trabalhador.start()
+        try:
+            while not self._parar.is_set():
+                for chave, mascara in self._seletor.select(timeout=0.1):
+                    if chave.fileobj is servidor:
+                        self._aceitar(servidor)
+                        continue
+                    conexao = chave.data
+                    if mascara & selectors.EVENT_READ:
+                        self._ler(conexao)
+                    if mascara & selectors.EVENT_WRITE and conexao.sock in self.conexoes:
+                        self._escrever(conexao)
+                for tipo, dados in self.trabalhador.drenar():
+                    self._distribuir(tipo, dados)
+        finally:
+            self.trabalhador.parar()
+            for sock in list(self.conexoes):
+                self._fechar(self.conexoes[sock])
+            self._seletor.close()
+            servidor.close()
+            os.unlink(self.caminho)
+
+    def _abrir_socket(self):
+        if os.path.exists(self.caminho):
+            sock = _conectar(self.caminho)
+            if sock is not None:
+                sock.close()
+                raise RuntimeError(f"Já existe um serviço de sincronização em {self.caminho}")
+            # Sobra de um serviço que terminou sem apagar o socket
+            os.unlink(self.caminho)
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Só o próprio usuário pode conectar (o socket dá acesso aos eventos)
+        mascara = os.umask(0o177)
+        try:
+            servidor.bind(self.caminho)
+        finally:
+            os.umask(mascara)
+        servidor.listen()
+        servidor.setblocking(False)
+        return servidor
+
+    def _aceitar(self, servidor):
+        try:
+            sock, _ = servidor.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        conexao = _Conexao(sock)
+        self.conexoes[sock] = conexao
+        self._seletor.register(sock, selectors.EVENT_READ, conexao)
+
+    def _ler(self, conexao):
+        try:
+            dados = conexao.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            dados = b''
+        if not dados:
+            self._fechar(conexao)
+            return
+        conexao.entrada += dados
+        while b'\n' in conexao.entrada:
+            linha, conexao.entrada = conexao.entrada.split(b'\n', 1)
+            try:
+                self._tratar(conexao, json.loads(linha))
+            except (ValueError, KeyError, TypeError) as e:
+                instrumentacao.aviso(f"Mensagem inválida de um widget: {e}")
+
+    def _tratar(self, conexao, mensagem):
+        op = mensagem['op']
+        if op == 'assinar':
+            conexao.janela = janela_de_json(mensagem['janela'])
+            conexao.enviada = False
+            if conexao.janela in self.conteudo:
+                # Janela já carregada (outro widget): responde na hora, sem consultar a API
+                self._enviar_completo(conexao)
+            self._atualizar_assinaturas()
+        elif op == 'atualizar':
+            self.trabalhador.solicitar_atualizacao(oportunista=mensagem.get('oportunista', False))
+
+    def _atualizar_assinaturas(self):
+        janelas = frozenset(c.janela for c in self.conexoes.values() if c.janela is not None)
+        if janelas != self.trabalhador.janela:
+            self.trabalhador.definir_janela(janelas)
+
+    def _distribuir(self, tipo, dados):
+        if tipo == sincronizacao.EVENTOS:
+            _, deltas = dados
+            for janela, (alterados, removidos) in deltas.items():
+                eventos = self.conteudo.setdefault(janela, {})
+                for chave in removidos:
+                    eventos.pop(chave, None)
+                for evento in alterados:
+                    eventos[(evento['calendario'] or '', evento['id'] or '')] = evento
+            # Janelas que ninguém mais assina saem junto com as da thread de sincronização
+            for janela in set(self.conteudo) - set(deltas):
+                del self.conteudo[janela]
+            for conexao in self._assinantes():
+                if conexao.janela not in deltas:
+                    continue  # Assinou durante a carga; a próxima já a inclui
+                if not conexao.enviada:
+                    self._enviar_completo(conexao)
+                    continue
+                alterados, removidos = deltas[conexao.janela]
+                if alterados or removidos:
+                    self._enviar(conexao, {'tipo': 'eventos', 'janela': janela_para_json(conexao.janela),
+                                           'completo': False, 'alterados': alterados,
+                                           'removidos': removidos})
+                else:
+                    self._enviar(conexao, {'tipo': 'sem_mudancas'})
+            return
+        if tipo == sincronizacao.ERRO:
+            mensagem = {'tipo': 'erro', 'mensagem': dados}
+        else:
+            mensagem = {'tipo': tipo}
+        for conexao in self._assinantes():
+            self._enviar(conexao, mensagem)
+
+    def _assinantes(self):
+        return [c for c in self.conexoes.values() if c.janela is not None]
+
+    def _enviar_completo(self, conexao):
+        conexao.enviada = True
+        self._enviar(conexao, {'tipo': 'eventos', 'janela': janela_para_json(conexao.janela),
+                               'completo': True,
+                               'alterados': list(self.conteudo[conexao.janela].values()),
+                               'removidos': []})
+
+    def _enviar(self, conexao, mensagem):
+        if conexao.sock not in self.conexoes:
+            return  # Fechada durante esta distribuição
+        conexao.saida += _linha(mensagem)
+        self._escrever(conexao)
+
+    def _escrever(self, conexao):
+        try:
+            enviados = conexao.sock.send(conexao.saida)
+        except BlockingIOError:
+            enviados = 0
+        except OSError:
+            self._fechar(conexao)
+            return
+        conexao.saida = conexao.saida[enviados:]
+        # Com saída pendente, espera o socket aceitar mais dados em vez de bloquear
+        eventos = selectors.EVENT_READ | (selectors.EVENT_WRITE if conexao.saida else 0)
+        if self._seletor.get_key(conexao.sock).events != eventos:
+            self._seletor.modify(conexao.sock, eventos, conexao)
+
+    def _fechar(self, conexao):
+        self._seletor.unregister(conexao.sock)
+        del self.conexoes[conexao.sock]
+        conexao.sock.close()
+        self._atualizar_assinaturas()
+
+
+# --- Widget ---
+
+class ClienteSincronizacao(threading.Thread):
+    """
+    Usado pelo widget no lugar do TrabalhadorSincronizacao quando o serviço está
+    rodando: mesma interface (mensagens, drenar, definir_janela,
+    solicitar_atualizacao, parar), mas os eventos chegam do serviço como
+    diferenças aplicadas sobre a janela assinada.
+    """
+
+    # Sem service local: a navegação não consulta o cache de janelas
+    contexto = None
+
+    drenar = sincronizacao.TrabalhadorSincronizacao.drenar
+
+    def __init__(self, sock, janela, caminho):
+        super().__init__(name='sincronizacao', daemon=True)
+        self.sock = sock
+        self.janela = janela
+        self.caminho = caminho
+        self.mensagens = queue.Queue()
+        self._eventos = {}  # chave -> Evento da janela assinada
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def definir_janela(self, janela):
+        self.janela = janela
+        self._enviar({'op': 'assinar', 'janela': janela_para_json(janela)})
+
+    def solicitar_atualizacao(self, oportunista=False):
+        self._enviar({'op': 'atualizar', 'oportunista': oportunista})
+
+    def parar(self):
+        self._parar.set()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def run(self):
+        while not self._parar.is_set():
+            self.definir_janela(self.janela)
+            try:
+                with self.sock.makefile('r', encoding='utf-8') as arquivo:
+                    for linha in arquivo:
+                        self._tratar(json.loads(linha))
+            except (OSError, ValueError) as e:
+                instrumentacao.aviso(f"Conexão com o serviço de sincronização: {e}")
+            self.sock.close()
+            if self._parar.is_set():
+                return
+            self.mensagens.put((sincronizacao.ERRO, "serviço de sincronização desconectado"))
+            # Os eventos na tela continuam; reconecta quando o serviço voltar
+            sock = None
+            while sock is None and not self._parar.wait(RECONECTAR_A_CADA):
+                sock = _conectar(self.caminho)
+            if sock is None:
+                return
+            self.sock = sock
+
+    def _enviar(self, mensagem):
+        with self._lock:
+            try:
+                self.sock.sendall(_linha(mensagem))
+            except OSError:
+                pass  # Desconectado: run() reconecta e assina de novo
+
+    def _tratar(self, mensagem):
+        tipo = mensagem['tipo']
+        if tipo == 'carregando':
+            self.mensagens.put((sincronizacao.CARREGANDO, None))
+        elif tipo == 'sem_mudancas':
+            self.mensagens.put((sincronizacao.SEM_MUDANCAS, None))
+        elif tipo == 'erro':
+            self.mensagens.put((sincronizacao.ERRO, mensagem['mensagem']))
+        elif tipo == 'eventos':
+            janela = janela_de_json(mensagem['janela'])
+            if janela != self.janela:
+                return  # Diferenças de uma janela da qual o widget já saiu
+            if mensagem['completo']:
+                self._eventos = {}
+            for calendario, id in mensagem['removidos']:
+                self._eventos.pop((calendario, id), None)
+            for dados in mensagem['alterados']:
+                evento = Evento.de_dict(dados)
+                self._eventos[_chave(evento)] = evento
+            eventos = sorted(self._eventos.values(), key=attrgetter('ordem'))
+            self.mensagens.put((sincronizacao.EVENTOS, (janela, eventos)))
+
+
+def conectar(janela, caminho=None):
+    """ClienteSincronizacao assinando `janela`, ou None se o serviço não estiver rodando."""
+    caminho = caminho or caminho_socket()
+    sock = _conectar(caminho)
+    if sock is None:
+        return None
+    return ClienteSincronizacao(sock, janela, caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--socket', help="caminho do socket (padrão: sync.sock no diretório de configuração)")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        sys.exit("Sockets Unix não estão disponíveis nesta plataforma")
+    servidor = ServidorSincronizacao(args.socket)
+    signal.signal(signal.SIGTERM, lambda *_: servidor.parar())
+    print(f"Serviço de sincronização em {servidor.caminho}", file=sys.stderr)
+    try:
+        servidor.executar()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        from api_calendario import credenciais
+        credenciais.parar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Thread de sincronização em segundo plano.
+Todo o I/O de rede (autenticação, build do service e chamadas à API) acontece
+aqui; a interface recebe apenas mensagens já processadas por uma fila thread-safe.
+"""
+import queue
+import random
+import threading
+import time
+import traceback
+
+import instrumentacao
+
+# Tipos de mensagem enviados para a interface
+CARREGANDO = 'carregando'
+EVENTOS = 'eventos'
+SEM_MUDANCAS = 'sem_mudancas'
+ERRO = 'erro'
+
+# Granularidade (s) da espera entre atualizações, usada para detectar suspensão
+TICK = 30
+
+
+def erro_de_cota(erro):
+    """Indica se o erro pede backoff: cota/limite de taxa (403/429), 5xx ou falha de rede."""
+    if isinstance(erro, OSError):
+        return True
+    resp = getattr(erro, 'resp', None)
+    status = getattr(resp, 'status', None)
+    if status is None:
+        return False
+    if status == 429 or status >= 500:
+        return True
+    if status == 403:
+        conteudo = getattr(erro, 'content', b'') or b''
+        return b'ateLimitExceeded' in conteudo or b'quotaExceeded' in conteudo
+    return False
+
+
+class AgendadorAtualizacao:
+    """
+    Decide quanto esperar até a próxima atualização:
+    - logo após uma mudança, atualiza com mais frequência (`minimo`);
+    - a cada atualização sem mudanças, o intervalo cresce até `maximo`;
+    - em erros de cota/servidor, backoff exponencial com jitter até `backoff_maximo`.
+    """
+
+    def __init__(self, minimo=60, base=5 * 60, maximo=15 * 60, backoff_maximo=60 * 60):
+        self.minimo = minimo
+        self.base = base
+        self.maximo = maximo
+        self.backoff_maximo = backoff_maximo
+        self.intervalo = base
+        self.falhas = 0
+
+    @property
+    def em_backoff(self):
+        return self.falhas > 0
+
+    def sucesso(self, mudou):
+        self.falhas = 0
+        if mudou:
+            self.intervalo = self.minimo
+        else:
+            self.intervalo = min(self.intervalo * 1.5, self.maximo)
+        return self.intervalo
+
+    def falha(self, erro):
+        if not erro_de_cota(erro):
+            return self.base
+        self.falhas += 1
+        teto = min(self.backoff_maximo, self.minimo * 2 ** self.falhas)
+        # Metade fixa, metade aleatória, para espalhar as novas tentativas
+        return teto / 2 + random.uniform(0, teto / 2)
+
+
+class TrabalhadorSincronizacao(threading.Thread):
+    """
+    Dono do `service` da API. Executa `preparar()` uma vez (autenticação e build)
+    e depois `carregar(contexto, janela)` conforme o agendador ou quando solicitado,
+    publicando o resultado em `self.mensagens` como tuplas (tipo, dados); para
+    EVENTOS, dados é (janela, eventos). `carregar` retorna None quando nada mudou
+    desde a última carga. Depois de cada carga, `prefetch(contexto, janela)`
+    (opcional) adianta o trabalho das próximas navegações.
+    """
+
+    def __init__(self, preparar, carregar, janela=None, prefetch=None, agendador=None):
+        super().__init__(name='sincronizacao', daemon=True)
+        self._preparar = preparar
+        self._carregar = carregar
+        self._prefetch = prefetch
+        self.janela = janela
+        self.contexto = None
+        self.agendador = agendador or AgendadorAtualizacao()
+        self.mensagens = queue.Queue()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._forcado = False
+        self._ultima = 0.0
+
+    def solicitar_atualizacao(self, oportunista=False):
+        """
+        Antecipa a próxima sincronização (pode ser chamado de qualquer thread).
+        Pedidos oportunistas (ex.: janela ganhou foco) são ignorados durante o
+        backoff ou se a última atualização foi há menos de `agendador.minimo`.
+        """
+        if not oportunista:
+            # Só a espera consome o pedido forçado: um oportunista logo depois
+            # (ex.: foco ao clicar na navegação) não pode rebaixá-lo
+            self._forcado = True
+        self._acordar.set()
+
+    def definir_janela(self, janela):
+        """Troca a janela exibida e carrega-a imediatamente."""
+        self.janela = janela
+        self.solicitar_atualizacao()
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def run(self):
+        while not self._parar.is_set():
+            self.mensagens.put((CARREGANDO, None))
+            janela = self.janela
+            try:
+                if self.contexto is None:
+                    self.contexto = self._preparar()
+                eventos = self._carregar(self.contexto, janela)
+                if eventos is None:
+                    self.mensagens.put((SEM_MUDANCAS, None))
+                else:
+                    self.mensagens.put((EVENTOS, (janela, eventos)))
+                espera = self.agendador.sucesso(eventos is not None)
+            except Exception as e:
+                instrumentacao.aviso(f"Erro ao sincronizar: {e}", traceback=traceback.format_exc())
+                self.mensagens.put((ERRO, str(e)))
+                espera = self.agendador.falha(e)
+            self._ultima = time.monotonic()
+
+            if self._prefetch is not None and self.contexto is not None and not self.agendador.em_backoff:
+                try:
+                    self._prefetch(self.contexto, janela)
+                except Exception as e:
+                    instrumentacao.aviso(f"Erro no prefetch: {e}")
+
+            # Aguarda o próximo ciclo, um pedido de atualização ou o fim de uma suspensão
+            self._aguardar(espera)
+
+    def _aguardar(self, espera):
+        limite = time.monotonic() + espera
+        while not self._parar.is_set():
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            parede, monotonico = time.time(), time.monotonic()
+            if self._acordar.wait(min(restante, TICK)):
+                self._acordar.clear()
+                if self._forcado:
+                    self._forcado = False
+                    return
+                recente = time.monotonic() - self._ultima < self.agendador.minimo
+                if not (self.agendador.em_backoff or recente):
+                    return
+                continue
+            # O relógio de parede andou bem mais que o monotônico: o computador
+            # estava suspenso, então os dados provavelmente estão velhos
+            if (time.time() - parede) - (time.monotonic() - monotonico) > TICK:
+                return
+
+    def drenar(self):
+        """Retorna todas as mensagens pendentes sem bloquear."""
+        pendentes = []
+        while True:
+            try:
+                pendentes.append(self.mensagens.get_nowait())
+            except queue.Empty:
+                return pendentes
@@ -0,0 +1,39 @@
+"""
+Tema de cores aplicado em tempo real.
+Cada widget é registrado com as chaves da paleta (CORES/CORES_DARK) que usa em
+cada opção; trocar de tema reconfigura os widgets existentes no lugar, sem
+recriar a janela.
+"""
+import tkinter as tk
+
+
+class Tema:
+    def __init__(self, cores):
+        self.cores = cores
+        self._widgets = []    # (widget, {opcao: chave da paleta})
+        self._ouvintes = []   # chamados com a nova paleta após cada troca
+
+    def registrar(self, widget, **opcoes):
+        """Associa opções do widget a chaves da paleta e já aplica as cores atuais."""
+        self._widgets.append((widget, opcoes))
+        widget.configure(**{opcao: self.cores[chave] for opcao, chave in opcoes.items()})
+        return widget
+
+    def ao_mudar(self, callback):
+        """Registra uma função chamada com a nova paleta (ex.: itens do canvas)."""
+        self._ouvintes.append(callback)
+
+    def aplicar(self, cores):
+        """Recolore todos os widgets registrados que ainda existem."""
+        self.cores = cores
+        vivos = []
+        for widget, opcoes in self._widgets:
+            try:
+                widget.configure(**{opcao: cores[chave] for opcao, chave in opcoes.items()})
+            except tk.TclError:
+                # Widget já destruído
+                continue
+            vivos.append((widget, opcoes))
+        self._widgets = vivos
+        for callback in self._ouvintes:
+            callback(cores)
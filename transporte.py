@@ -0,0 +1,137 @@
+"""
+Transporte HTTP compartilhado por todo o tráfego do widget: o service da
+Calendar API (httplib2), a renovação do token e o download de assets (requests).
+As conexões ficam abertas e são reaproveitadas (uma atualização paga um único
+handshake TLS), as respostas vêm com gzip, há timeouts separados para conectar
+e para ler e novas tentativas em falhas transitórias. Os contadores de
+requisições, conexões abertas e bytes recebidos aparecem no painel de diagnóstico.
+"""
+import threading
+
+# Timeouts (s) para abrir a conexão (incluindo o TLS) e para cada leitura
+TIMEOUT_CONEXAO = 5
+TIMEOUT_LEITURA = 30
+
+# Novas tentativas, com backoff exponencial, em respostas 429/5xx e erros de conexão
+TENTATIVAS = 3
+
+# A Google só comprime as respostas se o user-agent contiver "gzip"
+USER_AGENT = 'PyGoogleCal/1.0'
+
+_lock = threading.Lock()
+_http = None
+_sessao = None
+_contadores = {'requisicoes': 0, 'conexoes': 0, 'bytes': 0}
+
+
+def http_google():
+    """
+    httplib2.Http compartilhado para a Calendar API. Como o httplib2 não é
+    thread-safe, só a thread de sincronização (ou o processo da exportação) o usa.
+    """
+    global _http
+    with _lock:
+        if _http is None:
+            _http = _criar_http()
+        return _http
+
+
+def http_autorizado(creds):
+    """O transporte compartilhado com as credenciais OAuth (para o build do service)."""
+    import google_auth_httplib2
+    return google_auth_httplib2.AuthorizedHttp(creds, http=http_google())
+
+
+def sessao():
+    """requests.Session compartilhada (assets e renovação do token), com pool e novas tentativas."""
+    global _sessao
+    with _lock:
+        if _sessao is None:
+            _sessao = _criar_sessao()
+        return _sessao
+
+
+def estatisticas():
+    """Totais desde o início: requisições, conexões abertas, reaproveitadas e bytes recebidos."""
+    with _lock:
+        totais = dict(_contadores)
+        atual = _sessao
+    if atual is not None:
+        # O mesmo adaptador está montado em http:// e https://
+        for adaptador in set(atual.adapters.values()):
+            pools = adaptador.poolmanager.pools
+            for chave in pools.keys():
+                pool = pools[chave]
+                totais['requisicoes'] += pool.num_requests
+                totais['conexoes'] += pool.num_connections
+    totais['reaproveitadas'] = max(totais['requisicoes'] - totais['conexoes'], 0)
+    return totais
+
+
+def _contar(**valores):
+    with _lock:
+        for nome, valor in valores.items():
+            _contadores[nome] += valor
+
+
+def _criar_http():
+    import httplib2
+
+    class Conexao(httplib2.HTTPSConnectionWithTimeout):
+        def connect(self):
+            # Timeout curto só para conectar; depois, o de leitura
+            self.timeout = TIMEOUT_CONEXAO
+            super().connect()
+            self.sock.settimeout(TIMEOUT_LEITURA)
+            _contar(conexoes=1)
+
+        def getresponse(self):
+            resposta = super().getresponse()
+            ler = resposta.read
+
+            def read(*args):
+                # Corpo ainda comprimido: o httplib2 descomprime depois
+                dados = ler(*args)
+                _contar(bytes=len(dados))
+                return dados
+
+            resposta.read = read
+            return resposta
+
+    class Http(httplib2.Http):
+        def request(self, uri, method='GET', body=None, headers=None,
+                    redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+            headers = dict(headers or {})
+            # O googleapiclient já acrescenta "(gzip)" ao user-agent
+            headers['user-agent'] = f"{USER_AGENT} {headers.get('user-agent', '(gzip)')}"
+            if connection_type is None and uri.startswith('https:'):
+                connection_type = Conexao
+            _contar(requisicoes=1)
+            return super().request(uri, method, body, headers, redirections, connection_type)
+
+    return Http(timeout=TIMEOUT_LEITURA)
+
+
+def _criar_sessao():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class Sessao(requests.Session):
+        def request(self, method, url, **kwargs):
+            if kwargs.get('timeout') is None:
+                kwargs['timeout'] = (TIMEOUT_CONEXAO, TIMEOUT_LEITURA)
+            resposta = super().request(method, url, **kwargs)
+            if not kwargs.get('stream'):
+                # tell() conta os bytes lidos do socket, antes da descompressão
+                _contar(bytes=resposta.raw.tell())
+            return resposta
+
+    tentativas = Retry(total=TENTATIVAS, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                       allowed_methods=frozenset({'GET', 'HEAD'}), raise_on_status=False)
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=tentativas)
+    nova = Sessao()
+    nova.headers['User-Agent'] = f"{USER_AGENT} (gzip)"
+    nova.mount('https://', adaptador)
+    nova.mount('http://', adaptador)
+    return nova